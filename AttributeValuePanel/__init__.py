@@ -22,6 +22,8 @@
 """
 
 import os
+import time
+from functools import partial
 from qgis.PyQt.QtCore import *
 from qgis.PyQt.QtGui import *
 from qgis.PyQt.QtWidgets import *
@@ -30,15 +32,25 @@ from qgis.gui import *
 from .ui import AttributeValueDock
 from .dock_utils import get_all_tabified, is_user_visible
 from .compat_type import CompatType
-if Qgis.QGIS_VERSION_INT >= 33600:
-    FeatureRequestFlag = Qgis.FeatureRequestFlag
-else:
-    FeatureRequestFlag = QgsFeatureRequest.Flag
-if Qgis.QGIS_VERSION_INT >= 33800:
-    FieldOrigin = Qgis.FieldOrigin
-else:
-    FieldOrigin = QgsFields.FieldOrigin
-    FieldOrigin.Unknown = FieldOrigin.OriginUnknown  # for read-only flag
+from .aggregate import (collect_selection, collect_added, SelectionSummary,
+                        CollectTask)
+from .schema import (LayerSchema, PINNED_PROPERTY, HIDDEN_PROPERTY,
+                     field_profile, set_field_profile)
+from .cache import ResultCache, fingerprint
+from .prefetch import JoinPrefetch
+from .bulk_edit import (can_change_values, can_change_compact, change_buffered,
+                        change_provider, current_values, BulkChangeCommand)
+from .instrument import STATS
+from .multi_layer import MultiLayerMode
+
+# Refresh reasons, coalesced by the debounce timer
+REFRESH_VALUES = 0x1  # some columns of the current selection
+REFRESH_SELECTION = 0x2  # all columns
+REFRESH_FIELDS = 0x4  # the schema as well
+
+
+def format_count(n):
+    return '{}k'.format(n // 1000) if n >= 10000 else str(n)
 
 
 class AttributeValuePanel(QObject):
@@ -57,157 +69,701 @@ class AttributeValuePanel(QObject):
         self.dock.setObjectName(self.__class__.__name__.replace('Panel', ''))
         self.restore_dock_state()
 
-        self.model = self.dock.view.model()
-        self.model.itemChanged.connect(self.slot_itemChanged)
+        self.model = self.dock.model
+        self.model.valueEdited.connect(self.slot_valueEdited)
+        self.dock.view.valuesRequested.connect(self.slot_valuesRequested)
+        self.dock.view.clicked.connect(self.slot_valueClicked)
         self.dock.view.set_editable(False)
+        self.option_values = {}  # key -> value, read again on option changes
+        if Qgis.QGIS_VERSION_INT >= 31600:
+            QgsGui.instance().optionsChanged.connect(self.slot_optionsChanged)
+        STATS.enabled = self.option('instrumentation', False)
+        self.dock.set_footer_visible(STATS.enabled)
 
         self.debounce_timer = QTimer(self)
         self.debounce_timer.setSingleShot(True)
-        self.debounce_timer.timeout.connect(self.refresh_model)
+        self.debounce_timer.timeout.connect(self.run_pending_refresh)
+        self.pending_reasons = 0
+        self.pending_indexes = set()
+        self.last_refresh_ms = 0
+        self.refresh_started = 0
+        self.flush_timer = QTimer(self)
+        self.flush_timer.setSingleShot(True)
+        self.flush_timer.timeout.connect(self.flush_dirty_rows)
+        self.dirty_rows = set()
+        self.lazy_timer = QTimer(self)
+        self.lazy_timer.setSingleShot(True)
+        self.lazy_timer.timeout.connect(self.load_requested_rows)
+        self.requested_rows = set()
 
         self.current_layer = None
+        self.schemas = {}  # layer id -> LayerSchema
+        self.schema = None
+        self.summary = None
+        self.summary_fp = None  # cache key of the selection and layer revision
+        self.result_cache = ResultCache(self.option('cacheBudgetMB', 64) * 1024 * 1024)
+        self.watched_layers = {}  # layer id -> (layer, slot)
+        self.task = None
+        QgsProject.instance().layersWillBeRemoved.connect(self.slot_layersWillBeRemoved)
+        self.multi_layer = MultiLayerMode(self)
+        self.dock.multi_layer_action.setChecked(self.option('multiLayerMode', False))
+        self.dock.multi_layer_action.toggled.connect(self.slot_multiLayerToggled)
+        self.dock.pin_action.triggered.connect(self.slot_pinField)
+        self.dock.hide_action.triggered.connect(self.slot_hideField)
+        self.dock.show_hidden_action.triggered.connect(self.slot_showHiddenFields)
         self.dock.visibilityChanged.connect(self.slot_visibilityChanged)
         self.slot_visibilityChanged(is_user_visible(self.dock))
 
     def unload(self):
         self.slot_visibilityChanged(False)  # disconnect signals
+        self.cancel_task()
+        QgsProject.instance().layersWillBeRemoved.disconnect(self.slot_layersWillBeRemoved)
+        if Qgis.QGIS_VERSION_INT >= 31600:
+            QgsGui.instance().optionsChanged.disconnect(self.slot_optionsChanged)
+        for layer_id in list(self.watched_layers):
+            self.unwatch_layer(layer_id)
+        self.result_cache.clear()
         self.dock.visibilityChanged.disconnect(self.slot_visibilityChanged)
         self.save_dock_state()
         QgsApplication.removeTranslator(self.translator)
 
     def slot_visibilityChanged(self, visible):
+        if not visible:
+            self.stash_summary()  # no deltas are applied while hidden
         self.disconnect_layer_signals()
+        self.clear_pending()  # refreshed as a whole when shown again
         try:
             self.iface.currentLayerChanged.disconnect(self.slot_currentLayerChanged)
         except TypeError:
             pass
+        self.multi_layer.stop()
         if visible:
+            if self.dock.multi_layer_action.isChecked():
+                self.slot_currentLayerChanged(None)  # detach from the active layer
+                self.multi_layer.start()
+                return
             self.iface.currentLayerChanged.connect(self.slot_currentLayerChanged)
             self.slot_currentLayerChanged(self.iface.activeLayer())
 
+    def slot_multiLayerToggled(self, checked):
+        QgsSettings().setValue('%s/multiLayerMode' % self.__class__.__name__, checked)
+        self.option_values.pop('multiLayerMode', None)
+        self.slot_visibilityChanged(is_user_visible(self.dock))
+
+    def current_field(self):
+        # (layer, field) of the current row, or (layer, None)
+        view = self.dock.view
+        index = view.currentIndex()
+        if self.multi_layer.is_active:
+            if not index.isValid():
+                return None, None
+            model = view.model()
+            section = model.section_of(index) or model.sections[index.row()]
+            layer = QgsProject.instance().mapLayer(section.layer_id)
+            return layer, model.field_at(index)
+        if self.current_layer is None or not index.isValid():
+            return self.current_layer, None
+        return self.current_layer, view.model().field_at(index)
+
+    def slot_pinField(self):
+        layer, field = self.current_field()
+        if field is None:
+            return
+        pinned = field_profile(layer, PINNED_PROPERTY)
+        if field.name() in pinned:
+            pinned.remove(field.name())
+        else:
+            pinned.append(field.name())
+        set_field_profile(layer, PINNED_PROPERTY, pinned)
+        self.on_field_profile_changed(layer)
+
+    def slot_hideField(self):
+        layer, field = self.current_field()
+        if field is None:
+            return
+        hidden = field_profile(layer, HIDDEN_PROPERTY)
+        if field.name() not in hidden:
+            hidden.append(field.name())
+        pinned = field_profile(layer, PINNED_PROPERTY)
+        if field.name() in pinned:
+            pinned.remove(field.name())
+            set_field_profile(layer, PINNED_PROPERTY, pinned)
+        set_field_profile(layer, HIDDEN_PROPERTY, hidden)
+        self.on_field_profile_changed(layer)
+
+    def slot_showHiddenFields(self):
+        layer, _ = self.current_field()
+        if layer is None or not field_profile(layer, HIDDEN_PROPERTY):
+            return
+        set_field_profile(layer, HIDDEN_PROPERTY, [])
+        self.on_field_profile_changed(layer)
+
+    def on_field_profile_changed(self, layer):
+        schema = self.schemas.get(layer.id())
+        if schema is not None:
+            schema.visible = None
+        # Cached summaries lack the columns of newly shown fields
+        self.result_cache.invalidate(layer.id())
+        if self.multi_layer.is_active:
+            self.multi_layer.mark_dirty(layer.id())
+        elif layer is self.current_layer:
+            self.summary_fp = None  # columns differ, not worth stashing
+            self.on_refresh_model(REFRESH_FIELDS)
+
     def slot_currentLayerChanged(self, layer):
+        self.stash_summary()
         self.disconnect_layer_signals()
+        self.cancel_task()
+        self.clear_pending()
+        self.summary = None
         if isinstance(layer, QgsVectorLayer):
             self.current_layer = layer
         else:
             self.current_layer = None
+            self.schema = None
             self.clear_model()
             return
 
-        self.model.is_legacy_format = bool(
-                self.current_layer.dataProvider().storageType() in (
-                'ESRI Shapefile', 'MapInfo File'))
+        self.schema = self.schemas.get(layer.id())
+        if self.schema is not None and not self.schema.matches(layer):
+            self.schema = None
 
         self.current_layer.editingStarted.connect(self.on_editing_state_changed)
         self.current_layer.editingStopped.connect(self.on_editing_state_changed)
         self.on_editing_state_changed()
 
         self._updating = False
-        self.current_layer.selectionChanged.connect(self.on_refresh_model)
-        self.current_layer.updatedFields.connect(self.on_refresh_model)  # encoding change
-        self.current_layer.attributeValueChanged.connect(self.on_refresh_model)
-        self.current_layer.featureDeleted.connect(self.on_refresh_model)
+        self.current_layer.selectionChanged.connect(self.slot_selectionChanged)
+        self.current_layer.updatedFields.connect(self.on_fields_changed)  # encoding change
+        self.current_layer.dataSourceChanged.connect(self.on_fields_changed)
+        self.current_layer.attributeValueChanged.connect(self.slot_attributeValueChanged)
+        self.current_layer.featureDeleted.connect(self.slot_featureDeleted)
 
     def on_editing_state_changed(self):
-        self.dock.view.set_editable(self.current_layer.isEditable())
+        self.dock.view.set_editable(self.current_layer.isEditable() or
+                                    self.can_edit_provider())
         self.refresh_model()
 
-    def on_refresh_model(self):
-        if not self._updating:
-            self.debounce_timer.start(0)
+    def can_edit_provider(self):
+        # Non-editing workflow, values are written to the data source directly
+        return (self.option('directProviderEdits', False) and
+                can_change_values(self.current_layer.dataProvider()))
+
+    def on_refresh_model(self, reason=REFRESH_SELECTION, indexes=()):
+        if self._updating:
+            return
+        if self.cancel_task():
+            # The result is outdated, and may have been half written
+            reason |= REFRESH_SELECTION
+        self.pending_reasons |= reason
+        self.pending_indexes.update(indexes)
+        # Wait about as long as the last refresh took, so that bursts of
+        # signals coalesce instead of refreshing back to back
+        self.debounce_timer.start(min(int(self.last_refresh_ms),
+                                      self.option('maxDebounce', 500)))
+
+    def clear_pending(self):
+        self.debounce_timer.stop()
+        self.pending_reasons = 0
+        self.pending_indexes.clear()
+
+    def run_pending_refresh(self):
+        if not is_user_visible(self.dock):
+            # e.g. covered by another tab, check again later
+            self.debounce_timer.start(1000)
+            return
+        if self.pending_reasons == REFRESH_VALUES and self.summary is not None:
+            indexes = list(self.pending_indexes)
+            self.clear_pending()
+            self.reload_columns(indexes)
+        else:
+            self.refresh_model()
+
+    def on_fields_changed(self):
+        self.schemas.pop(self.current_layer.id(), None)
+        self.schema = None
+        self.on_refresh_model(REFRESH_FIELDS)
+
+    def slot_layersWillBeRemoved(self, layer_ids):
+        for layer_id in layer_ids:
+            self.schemas.pop(layer_id, None)
+            self.unwatch_layer(layer_id)
+        if self.current_layer is not None and self.current_layer.id() in layer_ids:
+            self.summary_fp = None  # nothing to stash
+
+    def stash_summary(self):
+        # Keeps the summary for switching back to the layer or the selection
+        summary, self.summary = self.summary, None
+        fp, self.summary_fp = self.summary_fp, None
+        if (summary is None or fp is None or self.task is not None or
+                self.debounce_timer.isActive() or self.schema is None or
+                self.schema.has_joins):
+            return
+        if fp[0] is None:
+            # Changed by selection deltas, the kept features are the selection
+            if summary.rows is None:
+                return
+            fp = fingerprint(self.current_layer, summary.rows) + fp[-1:]
+        self.watch_layer(self.current_layer)
+        self.result_cache.put(fp, summary)
+
+    def watch_layer(self, layer):
+        # Cached summaries are dropped on any change of the layer's data
+        if layer.id() in self.watched_layers:
+            return
+        slot = partial(self.result_cache.invalidate, layer.id())
+        for signal in (layer.layerModified, layer.afterRollBack,
+                       layer.dataChanged, layer.updatedFields,
+                       layer.dataSourceChanged, layer.subsetStringChanged):
+            signal.connect(slot)
+        self.watched_layers[layer.id()] = (layer, slot)
+
+    def unwatch_layer(self, layer_id):
+        layer, slot = self.watched_layers.pop(layer_id, (None, None))
+        if layer is None:
+            return
+        self.result_cache.remove_layer(layer_id)
+        try:
+            for signal in (layer.layerModified, layer.afterRollBack,
+                           layer.dataChanged, layer.updatedFields,
+                           layer.dataSourceChanged, layer.subsetStringChanged):
+                signal.disconnect(slot)
+        except (RuntimeError, TypeError):
+            pass
+
+    def slot_selectionChanged(self, selected, deselected, clearAndSelect):
+        if not clearAndSelect and self.apply_selection_delta(selected, deselected):
+            return
+        self.stash_summary()
+        self.on_refresh_model()
+
+    def apply_selection_delta(self, selected, deselected):
+        # Features added to or removed from the selection are applied to the
+        # summary in place, at a cost in proportion to the change.
+        # Returns False if the selection has to be scanned again.
+        summary = self.summary
+        if (summary is None or self.task is not None or
+                self.pending_reasons & ~REFRESH_VALUES):
+            return False
+        n_selected = self.current_layer.selectedFeatureCount()
+        if not n_selected or len(selected) * 2 > n_selected:
+            return False  # mostly new features, a rescan is not much slower
+        if selected and summary.rows is None:
+            return False  # selected ids may be counted already
+        if (self.option('asyncRefresh', True) and
+                len(selected) >= self.option('asyncThreshold', 5000)):
+            return False  # too slow to fetch here, scanned in the background
+        with STATS.timed('delta', len(selected) + len(deselected)):
+            if deselected and summary.remove_features(deselected) is None:
+                return False
+            if selected:
+                collect_added(self.current_layer, selected, summary)
+        if self.summary_fp is not None:
+            # Same layer revision, fingerprinted from the summary when stashed
+            self.summary_fp = (None,) + self.summary_fp[-1:]
+        # Counts and statistics change even if the distinct values do not
+        self.mark_dirty([pos for pos, x in enumerate(summary.loaded) if x])
+        return True
+
+    def slot_attributeValueChanged(self, fid, idx, value):
+        if self._updating or self.summary is None:
+            return  # nothing selected
+        if self.task is not None:
+            self.on_refresh_model(REFRESH_VALUES, [idx])
+            return
+        rows = self.summary.change_value(fid, idx, value)
+        if rows is None:
+            self.on_refresh_model(REFRESH_VALUES, [idx])
+        else:
+            self.mark_dirty(rows)
+        derived_indexes = self.get_schema().derived_indexes
+        if derived_indexes and (self.summary.rows is None or
+                                fid in self.summary.rows):
+            # Join and expression fields may depend on the changed value
+            self.on_refresh_model(REFRESH_VALUES, derived_indexes)
+
+    def slot_featureDeleted(self, fid):
+        if self._updating:
+            return
+        if self.summary is None or self.task is not None:
+            self.on_refresh_model()
+            return
+        rows = self.summary.remove_feature(fid)
+        if rows is None:
+            self.on_refresh_model()
+        else:
+            self.mark_dirty(rows)
+
+    def mark_dirty(self, rows):
+        # Repaints are coalesced, bursts of changes result in one update per row
+        self.dirty_rows.update(rows)
+        if self.dirty_rows:
+            self.flush_timer.start(0)
+
+    def flush_dirty_rows(self):
+        # The model shares the ValueCounts objects with the summary
+        self.model.refresh_rows(self.dirty_rows)
+        self.dirty_rows.clear()
+
+    def get_schema(self, layer=None):
+        # Built once per layer, selection changes do no schema work
+        if layer is not None and layer is not self.current_layer:
+            schema = self.schemas.get(layer.id())
+            if schema is None:
+                schema = self.schemas[layer.id()] = LayerSchema(layer)
+            return schema
+        if self.schema is None:
+            self.schema = LayerSchema(self.current_layer)
+            self.schemas[self.current_layer.id()] = self.schema
+        return self.schema
+
+    def get_pushdown(self, layer=None):
+        # Database side aggregation, None to scan the features in Python
+        layer = layer or self.current_layer
+        if (not self.option('providerPushdown', True) or
+                layer.isModified() or
+                layer.selectedFeatureCount() <
+                self.option('pushdownThreshold', 1000)):
+            return None
+        return self.get_schema(layer).get_pushdown(layer)
+
+    def get_prefetch(self, layer=None):
+        # Joined rows in one batch per joined layer, None to look them up
+        # per feature
+        layer = layer or self.current_layer
+        if (not self.option('prefetchJoins', True) or
+                not self.get_schema(layer).has_joins):
+            return None
+        return JoinPrefetch.create(layer)
+
+    def slot_optionsChanged(self):
+        self.option_values.clear()
+
+    def option(self, key, default):
+        # Read on every signal, the settings are only looked up once
+        value = self.option_values.get(key)
+        if value is None:
+            value = self.option_values[key] = QgsSettings().value(
+                    '%s/%s' % (self.__class__.__name__, key), default, type(default))
+        return value
 
     def refresh_model(self):
+        self.cancel_task()
+        self.clear_pending()
+        self.refresh_started = time.perf_counter()
+        indexes = self.get_schema().visible_indexes(self.current_layer)
+        if not self.current_layer.selectedFeatureCount():
+            self.summary_fp = None
+            self.populate_model(indexes, None)
+            return
+        # Data changes from now on outdate the summary
+        self.watch_layer(self.current_layer)
+        self.summary_fp = self.result_cache.key(fingerprint(self.current_layer,
+                self.current_layer.selectedFeatureIds()))
+        summary = self.result_cache.take(self.summary_fp)
+        if summary is not None:
+            self.populate_model(indexes, summary)
+            self.update_refresh_time()
+            return
+        summary = self.create_summary(indexes)
+        positions = self.primary_positions(indexes)
+        lazy_threshold = self.option('lazyFieldThreshold', 100)
+        if lazy_threshold and len(indexes) >= lazy_threshold:
+            # Only the names for now, values are loaded once rows are painted
+            self.populate_model(indexes, summary)
+        elif self.is_async():
+            if positions is not None or self.option('streamingRefresh', True):
+                # Rows are filled in as the scan goes on
+                self.populate_model(indexes, summary)
+            # Otherwise keep the current rows until the background result arrives
+            self.start_task(summary, positions)
+        else:
+            collect_selection(self.current_layer,
+                    self.current_layer.selectedFeatureIds(), summary, positions,
+                    self.get_pushdown(), prefetch=self.get_prefetch())
+            self.populate_model(indexes, summary)
+        self.update_refresh_time()
+
+    def primary_positions(self, indexes):
+        # Join and expression fields are the slow ones. They are left pending,
+        # and loaded like lazily loaded rows once the others are shown.
+        # None to collect all fields at once.
+        derived = self.get_schema().derived_indexes
+        if not derived or not self.option('deferDerivedFields', True):
+            return None
+        derived = set(derived)
+        positions = [pos for pos, idx in enumerate(indexes) if idx not in derived]
+        return positions or None
+
+    def update_refresh_time(self):
+        if self.task is None:
+            seconds = time.perf_counter() - self.refresh_started
+            self.last_refresh_ms = seconds * 1000
+            if STATS.enabled:
+                STATS.record('refresh', seconds,
+                             self.current_layer.selectedFeatureCount())
+                self.dock.update_footer()
+
+    def reload_columns(self, indexes):
+        # Rescans the given fields only, the selection is unchanged
+        summary = self.summary
+        positions = sorted(summary.positions[idx] for idx in set(indexes)
+                           if idx in summary.positions)
+        positions = [pos for pos in positions if summary.loaded[pos]]
+        if not positions:
+            return
+        self.refresh_started = time.perf_counter()
+        summary.reset_columns(positions)
+        if self.is_async():
+            self.model.set_values(positions, [None] * len(positions))
+            self.start_task(summary, positions)
+            return
+        collect_selection(self.current_layer,
+                self.current_layer.selectedFeatureIds(), summary, positions,
+                self.get_pushdown(), prefetch=self.get_prefetch())
+        self.mark_dirty(positions)
+        self.update_refresh_time()
+
+    def is_async(self):
+        return (self.option('asyncRefresh', True) and
+                self.current_layer.selectedFeatureCount() >=
+                self.option('asyncThreshold', 5000))
+
+    def start_task(self, summary, positions=None):
+        stream_interval = 0
+        shown = None
+        if summary is self.summary:
+            # The worker fills a summary of its own, merged into the shown one
+            # once completed. A canceled task may still be writing for a while.
+            shown, summary = summary, summary.empty_like()
+            if self.option('streamingRefresh', True):
+                # The rows of the summary are shown already
+                stream_interval = self.option('streamInterval', 250) / 1000
+        self.task = CollectTask(self.tr('Collecting attribute values'),
+                QgsVectorLayerFeatureSource(self.current_layer),
+                self.current_layer.selectedFeatureIds(), summary, positions,
+                self.get_pushdown(), stream_interval, self.get_prefetch())
+        self.task.shown = shown
+        self.task.chunkCollected.connect(
+                partial(self.slot_chunkCollected, self.task))
+        self.task.taskCompleted.connect(
+                partial(self.slot_taskCompleted, self.task))
+        self.task.taskTerminated.connect(
+                partial(self.slot_taskTerminated, self.task))
+        QgsApplication.taskManager().addTask(self.task)
+
+    def slot_valueClicked(self, index):
+        # A value under a field narrows the selection to its features
+        if (not index.internalId() or self.dock.view.model() is not self.model or
+                self.summary is None or self.task is not None):
+            return
+        row = index.internalId() - 1
+        value = self.model.frequency(row)[index.row()][0]
+        fids = self.summary.feature_ids(row, value)
+        if fids is None:
+            self.iface.messageBar().pushInfo(self.name,
+                    self.tr('The features of each value are not kept '
+                            'for this selection.'))
+            return
+        # Only deselects, applied to the summary as a delta
+        removed = self.current_layer.selectedFeatureIds() - set(fids)
+        if removed:
+            self.current_layer.deselect(list(removed))
+
+    def slot_valuesRequested(self, row):
+        self.requested_rows.add(row)
+        self.lazy_timer.start(0)
+
+    def load_requested_rows(self):
+        summary = self.summary
+        if summary is None or self.task is not None:
+            return  # retried when the task finishes
+        positions = sorted(x for x in self.requested_rows if not summary.loaded[x])
+        self.requested_rows.clear()
+        if not positions:
+            return
+        # Fill up the batch with the rows that follow, they are likely next
+        batch_size = self.option('lazyBatchSize', 50)
+        requested = set(positions)
+        for pos in range(positions[0], len(summary.columns)):
+            if len(requested) >= batch_size:
+                break
+            if not summary.loaded[pos]:
+                requested.add(pos)
+        positions = sorted(requested)
+        self.refresh_started = time.perf_counter()
+        if self.is_async():
+            self.start_task(summary, positions)
+            return
+        collect_selection(self.current_layer,
+                self.current_layer.selectedFeatureIds(), summary, positions,
+                self.get_pushdown(), prefetch=self.get_prefetch())
+        self.model.set_values(positions, [summary.values[x] for x in positions])
+        self.update_refresh_time()
+
+    def create_summary(self, indexes, layer=None):
+        schema = self.get_schema(layer)
+        converters = schema.converters
+        numeric = {idx for idx in indexes if schema.fields.at(idx).type() in (
+                   CompatType.Int, CompatType.LongLong, CompatType.Double)}
+        return SelectionSummary([(idx, converters[idx]) for idx in indexes],
+                cap=self.option('distinctCap', 1000),
+                sketched=numeric if self.option('estimateDistinct', True) else (),
+                cell_limit=self.option('deltaCellLimit', 2000000),
+                numeric=numeric if self.option('numericStats', True) else ())
+
+    def slot_chunkCollected(self, task, n, values):
+        # Partial values, the rows become final once the task completes
+        if task is self.task:
+            self.model.set_values(task.target_positions(), values)
+            self.model.set_progress(self.tr('scanning\u2026 {}/{}').format(
+                    format_count(n), format_count(len(task.fids))))
+
+    def slot_taskCompleted(self, task):
+        if task is self.task:
+            self.task = None
+            self.model.set_progress()
+            self.update_refresh_time()
+            if task.shown is None:
+                self.populate_model(task.summary.indexes(), task.summary)
+            elif task.shown is self.summary:
+                positions = task.target_positions()
+                self.summary.merge(task.summary, positions)
+                self.model.set_values(positions,
+                        [self.summary.values[x] for x in positions])
+                if self.requested_rows:
+                    self.lazy_timer.start(0)
+
+    def slot_taskTerminated(self, task):
+        if task is self.task:
+            self.task = None
+            self.model.set_progress()
+
+    def cancel_task(self):
+        # Returns True if a task was running
+        if self.task is None:
+            return False
+        task, self.task = self.task, None
+        task.cancel()
+        self.model.set_progress()
+        return True
+
+    def populate_model(self, indexes, summary):
         self.clear_model()
-        self.model.encoding = self.current_layer.dataProvider().encoding()
-        n_feats = self.current_layer.selectedFeatureCount()
-        dp = self.current_layer.dataProvider()
-        pks = dp.pkAttributeIndexes()
-        fields = self.current_layer.fields()
-        for idx in fields.allAttributesList():
-            field = fields.at(idx)
-            foi = fields.fieldOriginIndex(idx)
-
-            is_autogen = False
-            if foi in pks:
-                if dp.name() == 'ogr':
-                    ctx = 'QgsOgrProvider'
-                elif dp.name() == 'spatialite':
-                    ctx = 'QgsSpatiaLiteProvider'
-                else:
-                    ctx = None
-                s_autogen = QgsApplication.translate(ctx, 'Autogenerate')
-                if dp.defaultValueClause(foi) == s_autogen:
-                    is_autogen = True
-
-            key_item = QStandardItem()
-            key_item.setData(field, Qt.ItemDataRole.EditRole)
-            key_item.setData(fields.fieldOrigin(idx)
-                             if not is_autogen else
-                             FieldOrigin.Unknown,
-                             Qt.ItemDataRole.UserRole)
-            if n_feats:
-                if ( field.type() == CompatType.QVariantMap or
-                    field.typeName().endswith('List') ):
-                    conv = lambda x: str(x)
-                elif field.type() == CompatType.QByteArray:
-                    conv = lambda x: NULL if x == None else True
-                elif is_autogen:
-                    conv = lambda x: (NULL if x == None else
-                            x.defaultValueClause() if isinstance(x, QgsUnsetAttributeValue) else
-                            x)
-                else:
-                    conv = lambda x: NULL if x == None else x
-                req = (QgsFeatureRequest()
-                        .setSubsetOfAttributes([idx])
-                        .setFlags(FeatureRequestFlag.NoGeometry)
-                )
-                values = {conv(feat.attribute(idx))
-                        for feat in self.current_layer.getSelectedFeatures(req)}
-                value_item = QStandardItem()
-                value_item.setData(values, Qt.ItemDataRole.EditRole)
+        self.summary = summary
+        schema = self.get_schema()
+        self.model.encoding = schema.encoding
+        self.model.is_legacy_format = schema.is_legacy_format
+        field_list = []
+        origins = []
+        values = []
+        for i, idx in enumerate(indexes):
+            field_list.append(schema.field_list[idx])
+            origins.append(schema.origins[idx])
+            if summary is not None:
+                values.append(summary.values[i] if summary.loaded[i] else None)
             else:
-                s = field.displayType(showConstraints=True)
-                if foi in pks:
-                    s = s.replace(' N', ' PK N', 1)
-                if ('NOT NULL' not in s) and (' NULL' in s):
-                    s = s.replace(' NULL', '')
-                values = (s, )
-                value_item = QStandardItem()
-                value_item.setData(values, Qt.ItemDataRole.DisplayRole)
-                value_item.setEnabled(False)
-
-            self.model.appendRow([key_item, value_item])
+                values.append((schema.type_strings[idx], ))
+
+        self.model.set_rows(field_list, indexes, origins, values,
+                            enabled=summary is not None)
 
     def clear_model(self):
-        self.model.removeRows(0, self.model.rowCount())
+        self.dirty_rows.clear()
+        self.requested_rows.clear()
+        self.model.clear_rows()
+
+    def summary_is_current(self):
+        return (self.summary is not None and self.task is None and
+                not self.debounce_timer.isActive())
 
-    def slot_itemChanged(self, item):
-        # not called by clear_model
-        if not self.current_layer.isEditable():
+    def create_progress(self, n):
+        if n < self.option('bulkProgressThreshold', 10000):
+            return None
+        progress = QProgressDialog(self.tr('Changing attribute values...'),
+                self.tr('Cancel'), 0, n, self.iface.mainWindow())
+        progress.setWindowModality(Qt.WindowModality.WindowModal)
+        progress.setMinimumDuration(0)
+        return progress
+
+    def slot_valueEdited(self, row, value):
+        layer = self.current_layer
+        is_editable = layer.isEditable()
+        if not (is_editable or self.can_edit_provider()):
             raise RuntimeError
-        value = item.data(Qt.ItemDataRole.EditRole)[0]
-        self._updating = True
-        self.current_layer.beginEditCommand(self.tr('Attribute value changed'))
-        for fid in self.current_layer.selectedFeatureIds():
-            res = self.current_layer.changeAttributeValue(fid, item.row(), value)
-            if not res:
-                self.iface.messageBar().pushCritical(
-                        self.__class__.__name__,
-                        self.tr('Failed to change attribute value.'))
-                self.current_layer.destroyEditCommand()
-                break
+        idx = self.model.field_indexes[row]
+        is_current = self.summary_is_current()
+        # One undo command holding the old values grouped, instead of
+        # a command per feature. Its undo writes the old values back rather
+        # than dropping the changes from the buffer, so only for large edits.
+        is_compact = (is_editable and self.option('compactUndo', True) and
+                      layer.selectedFeatureCount() >=
+                      self.option('bulkProgressThreshold', 10000) and
+                      can_change_compact(layer))
+        if is_current and self.summary.rows is not None:
+            # Features already holding the value are skipped
+            changes = [(fid, values[row])
+                       for fid, values in self.summary.rows.items()
+                       if not (type(values[row]) is type(value) and
+                               values[row] == value)]
+        elif is_compact:
+            # Undo needs the old values
+            changes = current_values(layer, layer.selectedFeatureIds(), idx, value)
         else:
-            self.current_layer.endEditCommand()
+            # Looked up by QGIS on undo
+            changes = [(fid, None) for fid in layer.selectedFeatureIds()]
+        self._updating = True
+        progress = self.create_progress(len(changes))
+        with STATS.timed('edit', len(changes)):
+            if not changes:
+                res = True
+            elif is_compact:
+                command = BulkChangeCommand(layer, idx, value, changes,
+                                            self.tr('Attribute value changed'))
+                res = command.apply(progress)
+                if res:
+                    layer.undoStack().push(command)
+            elif is_editable:
+                layer.beginEditCommand(self.tr('Attribute value changed'))
+                res = change_buffered(layer, changes, idx, value, progress)
+                if res:
+                    layer.endEditCommand()
+                else:
+                    layer.destroyEditCommand()
+            else:
+                res = change_provider(layer.dataProvider(), changes,
+                        layer.fields().fieldOriginIndex(idx), value, progress)
+                layer.reload()
+                layer.triggerRepaint()
+        is_canceled = progress is not None and progress.wasCanceled()
+        if progress is not None:
+            progress.close()
+        if not res and not is_canceled:
+            self.iface.messageBar().pushCritical(
+                    self.__class__.__name__,
+                    self.tr('Failed to change attribute value.'))
         self._updating = False
 
+        if res and is_current:
+            self.summary.set_all(row, value)
+            self.mark_dirty([row])
+            derived_indexes = self.get_schema().derived_indexes
+            if derived_indexes:
+                self.on_refresh_model(REFRESH_VALUES, derived_indexes)
+        elif res or not is_editable:
+            # Partial writes to the provider are not rolled back
+            self.on_refresh_model(REFRESH_VALUES,
+                                  [idx] + self.get_schema().derived_indexes)
+
     def disconnect_layer_signals(self):
         try:
             self.current_layer.editingStarted.disconnect(self.on_editing_state_changed)
             self.current_layer.editingStopped.disconnect(self.on_editing_state_changed)
-            self.current_layer.selectionChanged.disconnect(self.on_refresh_model)
-            self.current_layer.updatedFields.disconnect(self.on_refresh_model)
-            self.current_layer.attributeValueChanged.disconnect(self.on_refresh_model)
-            self.current_layer.featureDeleted.disconnect(self.on_refresh_model)
+            self.current_layer.selectionChanged.disconnect(self.slot_selectionChanged)
+            self.current_layer.updatedFields.disconnect(self.on_fields_changed)
+            self.current_layer.dataSourceChanged.disconnect(self.on_fields_changed)
+            self.current_layer.attributeValueChanged.disconnect(self.slot_attributeValueChanged)
+            self.current_layer.featureDeleted.disconnect(self.slot_featureDeleted)
         except (AttributeError, RuntimeError, TypeError):
             pass
 
@@ -252,7 +808,6 @@ class AttributeValuePanel(QObject):
     def save_dock_state(self):
         mainwin = self.iface.mainWindow()
         st = QgsSettings()
-        st.remove(self.__class__.__name__)
         st.beginGroup(self.__class__.__name__)
         st.setValue('raised', is_user_visible(self.dock))
         st.setValue('visible', self.dock.isVisible())
@@ -0,0 +1,617 @@
+# -*- coding: utf-8 -*-
+"""
+/***************************************************************************
+ Attribute Value Panel
+                                 A QGIS plugin
+ Lists attribute values of selected features vertically
+                             -------------------
+        begin                : 2025-11-30
+        copyright            : (C) 2025 by Tarot Osuji
+        email                : tarot@sdf.org
+        git sha              : $Format:%H$
+ ***************************************************************************/
+
+/***************************************************************************
+ *                                                                         *
+ *   This program is free software; you can redistribute it and/or modify  *
+ *   it under the terms of the GNU General Public License as published by  *
+ *   the Free Software Foundation; either version 2 of the License, or     *
+ *   (at your option) any later version.                                   *
+ *                                                                         *
+ ***************************************************************************/
+"""
+
+import math
+import time
+from array import array
+from functools import partial
+from qgis.PyQt.QtCore import pyqtSignal
+from qgis.core import Qgis, QgsFeatureRequest, QgsTask, NULL
+try:
+    from qgis.core import QgsUnsetAttributeValue
+except ImportError:  # QGIS < 3.28
+    QgsUnsetAttributeValue = ()
+from .compat_type import CompatType
+from .instrument import STATS
+if Qgis.QGIS_VERSION_INT >= 33600:
+    FeatureRequestFlag = Qgis.FeatureRequestFlag
+else:
+    FeatureRequestFlag = QgsFeatureRequest.Flag
+
+
+def to_str(x):
+    return str(x)
+
+
+def to_presence(x):
+    return NULL if x == None else True
+
+
+def to_value(x):
+    return NULL if x == None else x
+
+
+def to_autogen(x):
+    return (NULL if x == None else
+            x.defaultValueClause() if isinstance(x, QgsUnsetAttributeValue) else
+            x)
+
+
+def make_converter(field, is_autogen=False):
+    if ( field.type() == CompatType.QVariantMap or
+        field.typeName().endswith('List') ):
+        return to_str
+    elif field.type() == CompatType.QByteArray:
+        return to_presence
+    elif is_autogen:
+        return to_autogen
+    return to_value
+
+
+def attribute_request(indexes):
+    return (QgsFeatureRequest()
+            .setSubsetOfAttributes(indexes)
+            .setFlags(FeatureRequestFlag.NoGeometry)
+    )
+
+
+class DistinctSketch:
+    # HyperLogLog estimator of the number of distinct values
+    P = 12
+    M = 1 << P
+    MASK = (1 << 64) - 1
+
+    def __init__(self):
+        self.registers = bytearray(self.M)
+
+    @classmethod
+    def hash(cls, value):
+        # splitmix64 finalizer, hash() of small ints is the int itself
+        h = (hash(value) + 0x9E3779B97F4A7C15) & cls.MASK
+        h = ((h ^ (h >> 30)) * 0xBF58476D1CE4E5B9) & cls.MASK
+        h = ((h ^ (h >> 27)) * 0x94D049BB133111EB) & cls.MASK
+        return h ^ (h >> 31)
+
+    def add(self, value):
+        h = self.hash(value)
+        i = h >> (64 - self.P)
+        rank = (64 - self.P) - (h & ((1 << (64 - self.P)) - 1)).bit_length() + 1
+        if rank > self.registers[i]:
+            self.registers[i] = rank
+
+    def estimate(self):
+        m = self.M
+        e = 0.7213 / (1 + 1.079 / m) * m * m / sum(2.0 ** -r for r in self.registers)
+        zeros = self.registers.count(0)
+        if e <= 2.5 * m and zeros:
+            e = m * math.log(m / zeros)
+        return int(round(e))
+
+
+class ValueCounts:
+    # Multiset of the converted values of one field.
+    # Behaves like the set of distinct values for the delegates.
+    # Stops collecting new values once the cap is reached,
+    # optionally estimating the true number of distinct values from then on.
+    # The revision is bumped whenever the displayed summary may change.
+    __slots__ = ('counts', 'cap', 'overflow', 'sketch', 'revision')
+
+    def __init__(self, cap=0, sketch=None):
+        self.counts = {}
+        self.cap = cap
+        self.overflow = False
+        self.sketch = sketch
+        self.revision = 0
+
+    def __len__(self):
+        return len(self.counts)
+
+    def __iter__(self):
+        return iter(self.counts)
+
+    def __contains__(self, value):
+        return value in self.counts
+
+    def add(self, value, count=1):
+        n = self.counts.get(value)
+        if n is not None:
+            self.counts[value] = n + count
+            return
+        self.revision += 1
+        # Once capped, values not counted so far would be counted from here on
+        if not self.overflow and (not self.cap or len(self.counts) < self.cap):
+            self.counts[value] = count
+        else:
+            if not self.overflow:
+                self.overflow = True
+                if self.sketch is not None:
+                    for x in self.counts:
+                        self.sketch.add(x)
+            if self.sketch is not None:
+                self.sketch.add(value)
+
+    def discard(self, value):
+        # Returns True if the value is no longer present
+        n = self.counts[value] - 1
+        if n:
+            self.counts[value] = n
+            return False
+        del self.counts[value]
+        self.revision += 1
+        return True
+
+    def clear(self):
+        self.revision += 1
+        self.counts.clear()
+        self.overflow = False
+        if self.sketch is not None:
+            self.sketch = DistinctSketch()
+
+    def reset(self, value, n):
+        self.clear()
+        self.counts[value] = n
+
+    def copy(self):
+        # Snapshot for another thread, the sketch is only needed once capped
+        other = type(self)(self.cap)
+        other.counts = dict(self.counts)
+        other.overflow = self.overflow
+        if self.overflow and self.sketch is not None:
+            other.sketch = DistinctSketch()
+            other.sketch.registers[:] = self.sketch.registers
+        other.revision = self.revision
+        return other
+
+    def estimate(self):
+        # Number of distinct values, None if only a lower bound is known
+        if not self.overflow:
+            return len(self.counts)
+        if self.sketch is not None:
+            return self.sketch.estimate()
+        return None
+
+
+class NumericCounts(ValueCounts):
+    # Statistics of the numbers, shown once there are too many distinct
+    # values to list. Taken from the counts until the cap is reached,
+    # accumulated by add_number from then on, when deltas are refused.
+    # Fed by SelectionSummary through add_number, add() only counts.
+    __slots__ = ('n', 'nulls', 'lo', 'hi', 'total', 'error', '_stats')
+
+    def __init__(self, cap=0, sketch=None):
+        super().__init__(cap, sketch)
+        self.init_running()
+        self._stats = None
+
+    def init_running(self):
+        self.n = self.nulls = 0
+        self.lo = self.hi = None
+        self.total = self.error = 0.0  # compensated sum
+
+    def add(self, value, count=1):
+        overflow = self.overflow
+        super().add(value, count)
+        if self.overflow and not overflow:
+            # Numbers counted so far, the value itself follows in add_number
+            for x, n in self.counts.items():
+                self.add_number(x, n)
+
+    def add_number(self, value, count=1):
+        self._stats = None
+        if not self.overflow:
+            return
+        if isinstance(value, (int, float)):
+            self.n += count
+            if self.lo is None or value < self.lo:
+                self.lo = value
+            if self.hi is None or value > self.hi:
+                self.hi = value
+            x = float(value) * count
+            t = self.total + x
+            if abs(self.total) >= abs(x):
+                self.error += (self.total - t) + x
+            else:
+                self.error += (x - t) + self.total
+            self.total = t
+        elif value == None:
+            self.nulls += count
+
+    def clear(self):
+        super().clear()
+        self.init_running()
+        self._stats = None
+
+    def reset(self, value, n):
+        super().reset(value, n)
+        self._stats = None
+
+    def discard(self, value):
+        # Only while exact, the accumulated statistics are not reduced
+        self._stats = None
+        return super().discard(value)
+
+    def copy(self):
+        # The statistics are published instead of the accumulators
+        other = super().copy()
+        other._stats = self.stats()
+        return other
+
+    def stats(self):
+        # (count, nulls, min, max, mean, sum), min and later None if all null
+        if self._stats is None:
+            if self.overflow:
+                n, nulls, lo, hi = self.n, self.nulls, self.lo, self.hi
+                total = self.total + self.error
+            else:
+                nulls = n = 0
+                numbers = []
+                for value, count in self.counts.items():
+                    if isinstance(value, (int, float)):
+                        numbers.append(value)
+                        n += count
+                    elif value == None:
+                        nulls += count
+                    # else default value clauses of new features
+                lo, hi = (min(numbers), max(numbers)) if numbers else (None, None)
+                total = math.fsum(x * self.counts[x] for x in numbers)
+            if n:
+                self._stats = (n + nulls, nulls, lo, hi, total / n, total)
+            else:
+                self._stats = (nulls, nulls, None, None, None, None)
+        return self._stats
+
+
+class SelectionSummary:
+    # Value counts of every field over the selected features.
+    # The converted values of each feature are kept as well,
+    # so that changes can be applied as deltas without a rescan.
+    # Beyond cell_limit values (features * columns) they are dropped to bound
+    # the memory use.
+    # Columns can also be loaded in batches, see add_partial.
+    def __init__(self, columns, cap=0, sketched=(), cell_limit=0, numeric=()):
+        self.columns = columns  # sequence of (field index, converter)
+        self.options = (cap, sketched, cell_limit, numeric)
+        self.positions = {idx: i for i, (idx, _) in enumerate(columns)}
+        self.values = [(NumericCounts if idx in numeric else ValueCounts)(
+                       cap, DistinctSketch() if idx in sketched else None)
+                       for idx, _ in columns]
+        self._numeric = [(pos, x) for pos, x in enumerate(self.values)
+                         if isinstance(x, NumericCounts)]
+        self.loaded = bytearray(len(columns))
+        self.rows = {}
+        # in features
+        self.row_limit = cell_limit and max(cell_limit // max(len(columns), 1), 1)
+        self.n_features = 0
+        self.inverted = {}  # position -> {value: array of fids}
+        self._dicts = [x.counts for x in self.values]
+
+    def empty_like(self):
+        # Same columns and options, nothing collected
+        return type(self)(self.columns, *self.options)
+
+    def merge(self, other, positions):
+        # Takes over the given columns collected into other, see empty_like
+        self.inverted.clear()
+        for pos in positions:
+            self.values[pos] = other.values[pos]
+            self._dicts[pos] = other.values[pos].counts
+            self.loaded[pos] = other.loaded[pos]
+        self._numeric = [(pos, x) for pos, x in enumerate(self.values)
+                         if isinstance(x, NumericCounts)]
+        if self.rows is None or other.rows is None:
+            self.rows = None
+        else:
+            width = len(self.columns)
+            for fid, row in other.rows.items():
+                mine = self.rows.get(fid)
+                if mine is None:
+                    mine = self.rows[fid] = [None] * width
+                for pos in positions:
+                    mine[pos] = row[pos]
+        self.n_features = other.n_features
+
+    def add_feature(self, fid, attrs):
+        row = [conv(attrs[idx]) for idx, conv in self.columns]
+        self.n_features += 1
+        if self.rows is not None:
+            if self.row_limit and self.n_features > self.row_limit:
+                self.rows = None
+            else:
+                self.rows[fid] = row
+        for values, counts, value in zip(self.values, self._dicts, row):
+            n = counts.get(value)
+            if n is not None:
+                counts[value] = n + 1
+            else:
+                values.add(value)
+        for pos, values in self._numeric:
+            values.add_number(row[pos])
+
+    def add_partial(self, fid, attrs, positions):
+        row = None
+        if self.rows is not None:
+            row = self.rows.get(fid)
+            if row is None:
+                if self.row_limit and len(self.rows) >= self.row_limit:
+                    self.rows = None
+                else:
+                    row = self.rows[fid] = [None] * len(self.columns)
+        for pos in positions:
+            idx, conv = self.columns[pos]
+            value = conv(attrs[idx])
+            if row is not None:
+                row[pos] = value
+            values = self.values[pos]
+            values.add(value)
+            if isinstance(values, NumericCounts):
+                values.add_number(value)
+
+    def add_counts(self, pos, counts):
+        # Value counts computed elsewhere, e.g. by the database.
+        # Values per feature are not known then, deltas are no longer possible.
+        self.rows = None
+        self.inverted.clear()
+        values = self.values[pos]
+        conv = self.columns[pos][1]
+        is_numeric = isinstance(values, NumericCounts)
+        for value, n in counts:
+            value = conv(value)
+            values.add(value, n)
+            if is_numeric:
+                values.add_number(value, n)
+        self.loaded[pos] = 1
+
+    def reset_columns(self, positions):
+        # Clears columns to be collected again with add_partial
+        self.inverted.clear()
+        for pos in positions:
+            self.values[pos].clear()
+            self.loaded[pos] = 0
+
+    def memory_size(self):
+        # Rough estimate in bytes, for the result cache budget
+        size = sum(len(x) for x in self.values) * 100
+        size += sum(DistinctSketch.M for x in self.values if x.sketch is not None)
+        if self.rows is not None:
+            size += len(self.rows) * (100 + 8 * len(self.columns))
+            size += len(self.inverted) * len(self.rows) * 8
+        return size
+
+    def indexes(self, positions=None):
+        if positions is None:
+            return [idx for idx, _ in self.columns]
+        return [self.columns[pos][0] for pos in positions]
+
+    def is_exact(self, pos=None):
+        # Whether deltas can be applied
+        if self.rows is None:
+            return False
+        if pos is None:
+            return not any(x.overflow for x in self.values)
+        return not self.values[pos].overflow
+
+    def remove_feature(self, fid):
+        # Returns the positions whose distinct values changed,
+        # or None if the summary has to be rebuilt
+        if self.rows is None:
+            return None
+        if fid not in self.rows:
+            return []
+        if any(x.overflow and self.loaded[pos] for pos, x in self._numeric):
+            return None  # statistics of all numbers
+        self.inverted.clear()
+        row = self.rows.pop(fid)
+        self.n_features -= 1
+        changed = []
+        for i, (values, value) in enumerate(zip(self.values, row)):
+            if not self.loaded[i]:
+                continue
+            # Capped columns stay lower bounds, uncounted values are skipped
+            if values.overflow and value not in values.counts:
+                continue
+            if values.discard(value):
+                changed.append(i)
+        return changed
+
+    def remove_features(self, fids):
+        # Returns the positions whose distinct values changed,
+        # or None if the summary has to be rebuilt
+        changed = set()
+        for fid in fids:
+            positions = self.remove_feature(fid)
+            if positions is None:
+                return None
+            changed.update(positions)
+        return changed
+
+    def feature_ids(self, pos, value):
+        # Ids of the features with the value, None if not known.
+        # Inverted from the values per feature kept by the scan on first
+        # use, the provider is not queried again.
+        if self.rows is None or not self.loaded[pos]:
+            return None
+        index = self.inverted.get(pos)
+        if index is None:
+            index = self.inverted[pos] = {}
+            for fid, row in self.rows.items():
+                fids = index.get(row[pos])
+                if fids is None:
+                    fids = index[row[pos]] = array('q')
+                fids.append(fid)
+        return index.get(value, array('q'))
+
+    def change_value(self, fid, idx, value):
+        # Returns the positions of the changed fields,
+        # or None if the summary has to be rebuilt
+        if self.rows is None:
+            return None
+        row = self.rows.get(fid)
+        pos = self.positions.get(idx)
+        if row is None or pos is None or not self.loaded[pos]:
+            return []
+        if not self.is_exact(pos):
+            return None
+        self.inverted.pop(pos, None)
+        value = self.columns[pos][1](value)
+        values = self.values[pos]
+        values.discard(row[pos])
+        values.add(value)
+        if isinstance(values, NumericCounts):
+            values.add_number(value)
+        row[pos] = value
+        return [pos]
+
+    def set_all(self, pos, value):
+        self.inverted.pop(pos, None)
+        value = self.columns[pos][1](value)
+        if self.rows is not None:
+            for row in self.rows.values():
+                row[pos] = value
+        self.values[pos].reset(value, self.n_features)
+        self.loaded[pos] = 1
+
+
+def collect_summary(features, summary, is_canceled=None, positions=None,
+                    on_chunk=None):
+    # All columns, or the given positions, are filled in a single pass
+    # over the features. on_chunk is called with the number of features
+    # scanned so far after every chunk.
+    summary.inverted.clear()
+    if positions is None:
+        add_feature = summary.add_feature
+    else:
+        add_feature = partial(summary.add_partial, positions=positions)
+    n = 0
+    for n, feat in enumerate(features, 1):
+        add_feature(feat.id(), feat.attributes())
+        if not n % 1000:
+            if is_canceled and is_canceled():
+                return None
+            if on_chunk is not None:
+                on_chunk(n)
+    summary.n_features = n
+    for pos in range(len(summary.columns)) if positions is None else positions:
+        summary.loaded[pos] = 1
+    return summary
+
+
+def remaining_positions(summary, positions, done):
+    if not done:
+        return positions
+    done = set(done)
+    return [pos for pos in (range(len(summary.columns))
+                            if positions is None else positions)
+            if pos not in done]
+
+
+def collect_selection(source, fids, summary, positions=None, pushdown=None,
+                      is_canceled=None, on_chunk=None, prefetch=None):
+    # source: the layer, or a QgsVectorLayerFeatureSource in a worker thread
+    # pushdown: optional SqlPushdown, the remaining columns are scanned here
+    # prefetch: optional JoinPrefetch for the joined columns
+    # Returns None if canceled, like collect_summary
+    if pushdown is not None:
+        with STATS.timed('pushdown') as t:
+            pushed = pushdown.collect(fids, summary, positions, is_canceled)
+            t.count = len(pushed)
+        if is_canceled and is_canceled():
+            return None
+        positions = remaining_positions(summary, positions, pushed)
+        if not positions:
+            return summary
+    if prefetch is not None:
+        with STATS.timed('prefetch') as t:
+            fetched = prefetch.collect(source, fids, summary, positions, is_canceled)
+            t.count = len(fetched)
+        if is_canceled and is_canceled():
+            return None
+        positions = remaining_positions(summary, positions, fetched)
+        if not positions:
+            return summary
+    req = attribute_request(summary.indexes(positions))
+    req.setFilterFids(fids)
+    with STATS.timed('fetch') as t:
+        res = collect_summary(source.getFeatures(req), summary, is_canceled,
+                              positions, on_chunk)
+        t.count = summary.n_features
+    return res
+
+
+def collect_added(source, fids, summary):
+    # Features joining the selection, for the loaded columns only.
+    # The other columns are scanned later over the whole selection.
+    # Ids may be selected already, which requires the kept features.
+    positions = [pos for pos, x in enumerate(summary.loaded) if x]
+    req = attribute_request(summary.indexes(positions))
+    req.setFilterFids([x for x in fids if x not in summary.rows])
+    summary.inverted.clear()
+    n = 0
+    with STATS.timed('fetch') as t:
+        for feat in source.getFeatures(req):
+            summary.add_partial(feat.id(), feat.attributes(), positions)
+            n += 1
+        t.count = n
+    summary.n_features += n
+
+
+class CollectTask(QgsTask):
+    # Runs collect_selection on a snapshot of the layer in a worker thread.
+    # The source must be a QgsVectorLayerFeatureSource created on the main thread.
+    # With a stream interval, copies of the partial values are published
+    # at most that often (in seconds) while scanning.
+    chunkCollected = pyqtSignal(int, object)  # features scanned, ValueCounts
+
+    def __init__(self, description, source, fids, summary, positions=None,
+                 pushdown=None, stream_interval=0, prefetch=None):
+        super().__init__(description)
+        self.source = source
+        self.fids = fids
+        self.summary = summary
+        self.positions = positions
+        self.pushdown = pushdown
+        self.prefetch = prefetch
+        self.shown = None  # summary to merge into when completed, if any
+        self.stream_interval = stream_interval
+        self.next_chunk = 0
+
+    def target_positions(self):
+        if self.positions is None:
+            return range(len(self.summary.columns))
+        return self.positions
+
+    def chunk_collected(self, n):
+        now = time.monotonic()
+        if now < self.next_chunk:
+            return
+        self.next_chunk = now + self.stream_interval
+        self.setProgress(n * 100 / max(len(self.fids), 1))
+        self.chunkCollected.emit(n, [self.summary.values[pos].copy()
+                                     for pos in self.target_positions()])
+
+    def run(self):
+        if self.stream_interval:
+            self.next_chunk = time.monotonic() + self.stream_interval
+        return collect_selection(self.source, self.fids, self.summary,
+                self.positions, self.pushdown, self.isCanceled,
+                self.chunk_collected if self.stream_interval else None,
+                self.prefetch) is not None
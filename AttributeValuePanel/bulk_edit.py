@@ -0,0 +1,169 @@
+# -*- coding: utf-8 -*-
+"""
+/***************************************************************************
+ Attribute Value Panel
+                                 A QGIS plugin
+ Lists attribute values of selected features vertically
+                             -------------------
+        begin                : 2025-11-30
+        copyright            : (C) 2025 by Tarot Osuji
+        email                : tarot@sdf.org
+        git sha              : $Format:%H$
+ ***************************************************************************/
+
+/***************************************************************************
+ *                                                                         *
+ *   This program is free software; you can redistribute it and/or modify  *
+ *   it under the terms of the GNU General Public License as published by  *
+ *   the Free Software Foundation; either version 2 of the License, or     *
+ *   (at your option) any later version.                                   *
+ *                                                                         *
+ ***************************************************************************/
+"""
+
+from array import array
+try:
+    from qgis.PyQt.QtWidgets import QUndoCommand
+except ImportError:  # Qt 6
+    from qgis.PyQt.QtGui import QUndoCommand
+from qgis.core import (Qgis, QgsVectorDataProvider, QgsVectorLayerEditPassthrough,
+                       QgsVectorLayerUndoCommandChangeAttribute)
+from .aggregate import attribute_request
+if Qgis.QGIS_VERSION_INT >= 34000:
+    ProviderCapability = Qgis.VectorProviderCapability
+else:
+    ProviderCapability = QgsVectorDataProvider
+
+CHUNK_SIZE = 1000
+
+
+def chunked(seq, size=CHUNK_SIZE):
+    for i in range(0, len(seq), size):
+        yield seq[i:i + size]
+
+
+def can_change_values(dp):
+    return bool(dp.capabilities() & ProviderCapability.ChangeAttributeValues)
+
+
+def change_buffered(layer, changes, idx, value, progress=None):
+    # changes: list of (fid, old value), None if the old value is not known
+    # Goes through the edit buffer, the caller wraps it in an edit command.
+    # Passing the old values saves a provider lookup per feature on undo.
+    done = 0
+    for chunk in chunked(changes):
+        for fid, old in chunk:
+            if old is None:
+                res = layer.changeAttributeValue(fid, idx, value)
+            else:
+                res = layer.changeAttributeValue(fid, idx, value, old)
+            if not res:
+                return False
+        done += len(chunk)
+        if progress is not None:
+            progress.setValue(done)
+            if progress.wasCanceled():
+                return False
+    return True
+
+
+def current_values(layer, fids, idx, value):
+    # (fid, current value) of the features not holding the value yet,
+    # in one request for the field
+    req = attribute_request([idx])
+    req.setFilterFids(fids)
+    changes = []
+    for feat in layer.getFeatures(req):
+        old = feat.attribute(idx)
+        if not (type(old) is type(value) and old == value):
+            changes.append((feat.id(), old))
+    return changes
+
+
+def change_provider(dp, changes, foi, value, progress=None):
+    # Writes to the data source directly, one request per chunk.
+    # Not undoable, only for layers outside of edit mode.
+    done = 0
+    for chunk in chunked(changes):
+        if not dp.changeAttributeValues({fid: {foi: value} for fid, _ in chunk}):
+            return False
+        done += len(chunk)
+        if progress is not None:
+            progress.setValue(done)
+            if progress.wasCanceled():
+                return False
+    return True
+
+
+def can_change_compact(layer):
+    # Whether values can be written to the edit buffer without going through
+    # QgsVectorLayer.changeAttributeValue, which also updates default values
+    # applied on update and writes through in transaction groups
+    if isinstance(layer.editBuffer(), QgsVectorLayerEditPassthrough):
+        return False
+    if not can_change_values(layer.dataProvider()):
+        return False
+    fields = layer.fields()
+    return not any(fields.at(idx).defaultValueDefinition().applyOnUpdate()
+                   for idx in fields.allAttributesList())
+
+
+class BulkChangeCommand(QUndoCommand):
+    # One undo step for a value written to many features through the edit
+    # buffer. Instead of an old/new value pair per feature, only the new value
+    # and the features grouped by their old value are kept.
+    # Every change is applied by a short-lived buffer command, which is not
+    # pushed to the undo stack. Undone changes stay in the buffer as writes
+    # of the old values, and are committed as such.
+    def __init__(self, layer, idx, value, changes, text):
+        super().__init__(text)
+        self.buffer = layer.editBuffer()
+        self.idx = idx
+        self.value = value
+        self.groups = {}  # old value -> array of fids
+        for fid, old in changes:
+            fids = self.groups.get(old)
+            if fids is None:
+                fids = self.groups[old] = array('q')
+            fids.append(fid)
+        self.is_applied = False  # by apply() before being pushed
+
+    def __len__(self):
+        return sum(len(x) for x in self.groups.values())
+
+    def change(self, fid, new, old):
+        QgsVectorLayerUndoCommandChangeAttribute(
+                self.buffer, fid, self.idx, new, old).redo()
+
+    def apply(self, progress=None):
+        # The first redo, returns False if canceled with nothing changed
+        done = 0
+        applied = []  # (old value, fids) changed so far
+        for old, fids in self.groups.items():
+            for chunk in chunked(fids):
+                for fid in chunk:
+                    self.change(fid, self.value, old)
+                applied.append((old, chunk))
+                done += len(chunk)
+                if progress is not None:
+                    progress.setValue(done)
+                    if progress.wasCanceled():
+                        for old_, chunk_ in applied:
+                            for fid in chunk_:
+                                self.change(fid, old_, self.value)
+                        return False
+        self.is_applied = True
+        return True
+
+    def redo(self):
+        if self.is_applied:
+            self.is_applied = False  # pushed after apply()
+            return
+        for old, fids in self.groups.items():
+            for fid in fids:
+                self.change(fid, self.value, old)
+
+    def undo(self):
+        for old, fids in self.groups.items():
+            for fid in fids:
+                self.change(fid, old, self.value)
@@ -0,0 +1,84 @@
+# -*- coding: utf-8 -*-
+"""
+/***************************************************************************
+ Attribute Value Panel
+                                 A QGIS plugin
+ Lists attribute values of selected features vertically
+                             -------------------
+        begin                : 2025-11-30
+        copyright            : (C) 2025 by Tarot Osuji
+        email                : tarot@sdf.org
+        git sha              : $Format:%H$
+ ***************************************************************************/
+
+/***************************************************************************
+ *                                                                         *
+ *   This program is free software; you can redistribute it and/or modify  *
+ *   it under the terms of the GNU General Public License as published by  *
+ *   the Free Software Foundation; either version 2 of the License, or     *
+ *   (at your option) any later version.                                   *
+ *                                                                         *
+ ***************************************************************************/
+"""
+
+from collections import OrderedDict
+
+
+def fingerprint(layer, fids):
+    return (layer.id(), len(fids), hash(frozenset(fids)))
+
+
+class ResultCache:
+    # LRU of selection summaries, keyed by (layer id, selection fingerprint,
+    # layer revision). The revision is bumped on every data change of the
+    # layer, entries of older revisions are dropped right away.
+    # Keys are taken when a summary is computed, so that summaries outdated
+    # by later changes are not stored.
+    def __init__(self, budget):
+        self.entries = OrderedDict()  # key -> (summary, size)
+        self.budget = budget  # bytes, 0 to disable
+        self.size = 0
+        self.revisions = {}  # layer id -> revision
+
+    def key(self, fp):
+        return fp + (self.revisions.get(fp[0], 0),)
+
+    def take(self, key):
+        # The summary is handed back to the panel, which may change it
+        entry = self.entries.pop(key, None)
+        if entry is None:
+            return None
+        self.size -= entry[1]
+        return entry[0]
+
+    def put(self, key, summary):
+        if not self.budget or key[-1] != self.revisions.get(key[0], 0):
+            return
+        size = summary.memory_size()
+        if size > self.budget and summary.rows is not None:
+            # Values per feature are only needed for deltas
+            summary.rows = None
+            size = summary.memory_size()
+        if size > self.budget:
+            return
+        old = self.entries.pop(key, None)
+        if old is not None:
+            self.size -= old[1]
+        self.entries[key] = (summary, size)
+        self.size += size
+        while self.size > self.budget:
+            _, (_, size) = self.entries.popitem(last=False)
+            self.size -= size
+
+    def invalidate(self, layer_id):
+        self.revisions[layer_id] = self.revisions.get(layer_id, 0) + 1
+        for key in [x for x in self.entries if x[0] == layer_id]:
+            self.size -= self.entries.pop(key)[1]
+
+    def remove_layer(self, layer_id):
+        self.invalidate(layer_id)
+        del self.revisions[layer_id]
+
+    def clear(self):
+        self.entries.clear()
+        self.size = 0
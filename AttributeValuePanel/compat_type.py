@@ -36,3 +36,14 @@ else:
     CompatType.QDateTime = CompatType.DateTime
     CompatType.QVariantMap = CompatType.Map
     CompatType.QByteArray = CompatType.ByteArray
+
+if Qgis.QGIS_VERSION_INT >= 33800:
+    FieldOrigin = Qgis.FieldOrigin
+else:
+    from qgis.core import QgsFields
+    FieldOrigin = QgsFields.FieldOrigin
+    FieldOrigin.Unknown = FieldOrigin.OriginUnknown
+    FieldOrigin.Provider = FieldOrigin.OriginProvider
+    FieldOrigin.Join = FieldOrigin.OriginJoin
+    FieldOrigin.Edit = FieldOrigin.OriginEdit
+    FieldOrigin.Expression = FieldOrigin.OriginExpression
@@ -21,6 +21,7 @@
  ***************************************************************************/
 """
 
+import codecs
 import math
 from qgis.PyQt.QtCore import QRegularExpression
 from qgis.PyQt.QtGui import QValidator
@@ -31,6 +32,9 @@ class IntLengthValidator(QValidator):
 
     def __init__(self, length, is_legacy, parent=None):
         super().__init__(parent)
+        self.configure(length, is_legacy)
+
+    def configure(self, length, is_legacy):
         self.length = length
         self.is_legacy = is_legacy
 
@@ -54,6 +58,10 @@ class IntFilterLineEdit(QgsFilterLineEdit):
         super().__init__(parent)
         self.setValidator(IntLengthValidator(length, is_legacy, self))
 
+    def configure(self, length=0, is_legacy=False):
+        # For reuse with another field
+        self.validator().configure(length, is_legacy)
+
 
 def calc_max_float_value(length, prec):
     if length <= 15:
@@ -63,13 +71,19 @@ def calc_max_float_value(length, prec):
     return f
 
 
+def is_digits(s):
+    return s.isdigit() and s.isascii()
+
+
 class DoubleLengthValidator(QValidator):
-    regex = QRegularExpression(r'^-?\.\d+$|'
-                               r'^-?0(\.\d*)?$|'
-                               r'^-?[1-9]\d*(\.\d*)?$')
+    # Accepts what r'^-?\.\d+$|^-?0(\.\d*)?$|^-?[1-9]\d*(\.\d*)?$' would,
+    # parsed with string methods on every keystroke
 
     def __init__(self, length, prec, is_legacy, parent=None):
         super().__init__(parent)
+        self.configure(length, prec, is_legacy)
+
+    def configure(self, length, prec, is_legacy):
         self.length = length
         self.prec = prec
         self.is_legacy = is_legacy
@@ -79,19 +93,24 @@ class DoubleLengthValidator(QValidator):
     def validate(self, input, pos):
         if not input:
             return (QValidator.State.Acceptable, input, pos)
-        if self.regex.match(input).hasMatch():
+        is_negative = input[0] == '-'
+        int_part, dot, frac = input[is_negative:].partition('.')
+        if ((is_digits(int_part) and
+                (int_part[0] != '0' or int_part == '0') and
+                (not frac or is_digits(frac))) or
+                (not int_part and dot and is_digits(frac))):
             if self.length <= 0:
                 return (QValidator.State.Acceptable, input, pos)
-            v = float(input)
-            try:
-                idx = input.index('.')
-            except ValueError:
-                idx = len(input)
+            # -0 and -0.0 are not negative
+            is_negative = is_negative and bool(int_part.strip('0') or
+                                               frac.strip('0'))
+            idx = len(input) - len(dot) - len(frac)
             # Include the minus sign
-            length_ = self.length + (not self.is_legacy and v < 0)
+            length_ = self.length + (not self.is_legacy and is_negative)
             if (idx <= length_ - self.prec) and \
                     (len(input) <= idx + 1 + self.prec):
-                if self.bottom <= v <= self.top:
+                # The digit counts keep narrower fields within the range
+                if self.length <= 15 or self.bottom <= float(input) <= self.top:
                     return (QValidator.State.Acceptable, input, pos)
                 else:
                     return (QValidator.State.Intermediate, input, pos)
@@ -118,20 +137,60 @@ class DoubleFilterLineEdit(QgsFilterLineEdit):
         super().__init__(parent)
         self.setValidator(DoubleLengthValidator(length, prec, is_legacy, self))
 
+    def configure(self, length=0, prec=0, is_legacy=False):
+        self.validator().configure(length, prec, is_legacy)
+
+
+def is_additive(encoding):
+    # Whether the encoded length of a string is the sum of its parts,
+    # i.e. no byte order marks or shift states
+    name = codecs.lookup(encoding).name
+    return (not name.startswith(('iso2022', 'utf-7', 'utf_7')) and
+            len('aa'.encode(encoding)) == 2 * len('a'.encode(encoding)))
+
 
 class ByteLengthValidator(QValidator):
+    # The byte length of the previous input is kept, so that a keystroke
+    # or a paste only encodes the inserted or removed text
     def __init__(self, byte_length, encoding, parent=None):
         super().__init__(parent)
+        self.configure(byte_length, encoding)
+
+    def configure(self, byte_length, encoding):
         self.byte_length = byte_length
         self.encoding = encoding
+        self.is_additive = is_additive(encoding)
         self.prev_value = None
+        self.prev_length = None  # encoded length of prev_value
+
+    def encoded_length(self, input, pos):
+        prev = self.prev_value
+        if self.is_additive and self.prev_length is not None:
+            # pos is the cursor position after the edit
+            d = len(input) - len(prev)
+            if d > 0 and pos >= d:
+                start = pos - d
+                if input.startswith(prev[:start]) and input.endswith(prev[start:]):
+                    return self.prev_length + len(
+                            input[start:pos].encode(self.encoding))
+            elif d < 0 and pos <= len(input):
+                end = pos - d
+                if input.startswith(prev[:pos]) and input.endswith(prev[end:]):
+                    return self.prev_length - len(
+                            prev[pos:end].encode(self.encoding))
+            elif d == 0 and input == prev:
+                return self.prev_length
+        return len(input.encode(self.encoding))
 
     def validate(self, input, pos):
+        length = None
         try:
             if not input:
+                length = 0
                 return (QValidator.State.Acceptable, input, pos)
             try:
-                if len(input.encode(self.encoding)) <= self.byte_length:
+                length = self.encoded_length(input, pos)
+                if length <= self.byte_length:
                     return (QValidator.State.Acceptable, input, pos)
                 fixed = self.fixup(input)
                 if fixed != self.prev_value:
@@ -141,26 +200,36 @@ class ByteLengthValidator(QValidator):
             return (QValidator.State.Invalid, input, pos)
         finally:
             self.prev_value = input
+            self.prev_length = length
 
     def fixup(self, input):
-        encoded = input.encode(self.encoding)
-        if len(encoded) > self.byte_length:
-            truncated = encoded[:self.byte_length]
-            while truncated:
-                try:
-                    return truncated.decode(self.encoding)
-                except UnicodeDecodeError:
-                    truncated = truncated[:-1]
+        # Every character takes at least one byte,
+        # so the truncated text is within the first byte_length characters
+        encoded = input[:self.byte_length].encode(self.encoding)
+        if len(encoded) > self.byte_length or len(input) > self.byte_length:
+            # The incremental decoder holds back an incomplete last character
+            return codecs.getincrementaldecoder(self.encoding)().decode(
+                    encoded[:self.byte_length])
         return input
 
 
 class ByteFilterLineEdit(QgsFilterLineEdit):
     def __init__(self, byte_length=0xFFFF, encoding='utf-8', is_legacy=False, parent=None):
         super().__init__(parent)
+        self.byte_validator = None
+        self.configure(byte_length, encoding, is_legacy)
+
+    def configure(self, byte_length=0xFFFF, encoding='utf-8', is_legacy=False):
         if is_legacy:
-            self.setValidator(ByteLengthValidator(byte_length, encoding, self))
-        elif byte_length > 0:
-            self.setMaxLength(byte_length)
+            if self.byte_validator is None:
+                self.byte_validator = ByteLengthValidator(byte_length, encoding, self)
+            else:
+                self.byte_validator.configure(byte_length, encoding)
+            self.setValidator(self.byte_validator)
+            self.setMaxLength(32767)  # QLineEdit's default
+        else:
+            self.setValidator(None)
+            self.setMaxLength(byte_length if byte_length > 0 else 32767)
 
 
 if __name__ == '__main__':
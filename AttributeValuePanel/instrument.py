@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+"""
+/***************************************************************************
+ Attribute Value Panel
+                                 A QGIS plugin
+ Lists attribute values of selected features vertically
+                             -------------------
+        begin                : 2025-11-30
+        copyright            : (C) 2025 by Tarot Osuji
+        email                : tarot@sdf.org
+        git sha              : $Format:%H$
+ ***************************************************************************/
+
+/***************************************************************************
+ *                                                                         *
+ *   This program is free software; you can redistribute it and/or modify  *
+ *   it under the terms of the GNU General Public License as published by  *
+ *   the Free Software Foundation; either version 2 of the License, or     *
+ *   (at your option) any later version.                                   *
+ *                                                                         *
+ ***************************************************************************/
+"""
+
+import time
+from collections import deque
+from qgis.core import Qgis, QgsMessageLog
+
+LOG_TAG = 'AttributeValuePanel'
+
+
+class Timer:
+    __slots__ = ('stats', 'name', 'count', 'start')
+
+    def __init__(self, stats, name, count=0):
+        self.stats = stats
+        self.name = name
+        self.count = count  # may be set inside the with block
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        if self.stats.enabled:
+            self.stats.record(self.name, time.perf_counter() - self.start,
+                              self.count)
+
+
+class Stats:
+    # Durations and item counts of the instrumented steps.
+    # Every step has its own ring buffer, so that frequent ones like paint
+    # do not push out the rare ones.
+    # Also recorded from worker threads, deque.append is atomic.
+    def __init__(self, size=100):
+        self.size = size
+        self.enabled = False
+        self.samples = {}  # name -> deque of (seconds, count)
+
+    def record(self, name, seconds, count=0):
+        samples = self.samples.get(name)
+        if samples is None:
+            samples = self.samples.setdefault(name, deque(maxlen=self.size))
+        samples.append((seconds, count))
+
+    def timed(self, name, count=0):
+        return Timer(self, name, count)
+
+    def last(self, name):
+        # (seconds, count) of the latest sample, or None
+        samples = self.samples.get(name)
+        return samples[-1] if samples else None
+
+    def clear(self):
+        self.samples.clear()
+
+    def report(self):
+        lines = []
+        for name, samples in sorted(self.samples.items()):
+            samples = list(samples)
+            if not samples:
+                continue
+            durations = [x for x, _ in samples]
+            lines.append(
+                    '{}: {} samples, last {:.1f} ms, mean {:.2f} ms, '
+                    'max {:.1f} ms, last count {}'.format(
+                    name, len(samples), durations[-1] * 1000,
+                    sum(durations) / len(durations) * 1000,
+                    max(durations) * 1000, samples[-1][1]))
+        return lines
+
+    def dump(self):
+        for line in self.report() or ['No samples recorded']:
+            QgsMessageLog.logMessage(line, LOG_TAG, Qgis.Info)
+
+
+STATS = Stats()
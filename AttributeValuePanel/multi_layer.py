@@ -0,0 +1,170 @@
+# -*- coding: utf-8 -*-
+"""
+/***************************************************************************
+ Attribute Value Panel
+                                 A QGIS plugin
+ Lists attribute values of selected features vertically
+                             -------------------
+        begin                : 2025-11-30
+        copyright            : (C) 2025 by Tarot Osuji
+        email                : tarot@sdf.org
+        git sha              : $Format:%H$
+ ***************************************************************************/
+
+/***************************************************************************
+ *                                                                         *
+ *   This program is free software; you can redistribute it and/or modify  *
+ *   it under the terms of the GNU General Public License as published by  *
+ *   the Free Software Foundation; either version 2 of the License, or     *
+ *   (at your option) any later version.                                   *
+ *                                                                         *
+ ***************************************************************************/
+"""
+
+from functools import partial
+from qgis.PyQt.QtCore import QObject, QTimer
+from qgis.core import (QgsApplication, QgsProject, QgsVectorLayer,
+                       QgsVectorLayerFeatureSource)
+from .aggregate import CollectTask
+
+
+class MultiLayerMode(QObject):
+    # Read-only summaries of the selections of all vector layers in the
+    # project, one section per layer with a selection.
+    # Every layer is collected from its own feature source snapshot by its
+    # own task, which the task manager runs in parallel on its thread pool.
+    # A layer's section is refreshed only when that layer changes.
+    def __init__(self, panel):
+        super().__init__()
+        self.panel = panel
+        self.model = panel.dock.multi_layer_model
+        self.is_active = False
+        self.layers = {}  # layer id -> (layer, slots)
+        self.tasks = {}  # layer id -> CollectTask
+        self.dirty = set()  # layer ids
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.timeout.connect(self.refresh_dirty)
+
+    def start(self):
+        if self.is_active:
+            return
+        self.is_active = True
+        self.panel.dock.set_multi_layer(True)
+        self.panel.dock.view.set_editable(False)
+        project = QgsProject.instance()
+        project.layersAdded.connect(self.slot_layersAdded)
+        project.layersWillBeRemoved.connect(self.slot_layersWillBeRemoved)
+        self.slot_layersAdded(project.mapLayers().values())
+
+    def stop(self):
+        if not self.is_active:
+            return
+        self.is_active = False
+        project = QgsProject.instance()
+        project.layersAdded.disconnect(self.slot_layersAdded)
+        project.layersWillBeRemoved.disconnect(self.slot_layersWillBeRemoved)
+        for layer_id in list(self.layers):
+            self.unobserve(layer_id)
+        self.timer.stop()
+        self.dirty.clear()
+        self.model.clear_sections()
+        self.panel.dock.set_multi_layer(False)
+
+    def slot_layersAdded(self, layers):
+        for layer in layers:
+            if isinstance(layer, QgsVectorLayer) and layer.id() not in self.layers:
+                self.observe(layer)
+                self.mark_dirty(layer.id())
+
+    def slot_layersWillBeRemoved(self, layer_ids):
+        for layer_id in layer_ids:
+            self.unobserve(layer_id)
+
+    def observe(self, layer):
+        layer_id = layer.id()
+        changed = partial(self.mark_dirty, layer_id)
+        fields_changed = partial(self.slot_fieldsChanged, layer_id)
+        slots = [
+            (layer.selectionChanged, changed),
+            (layer.layerModified, changed),
+            (layer.afterRollBack, changed),
+            (layer.dataChanged, changed),
+            (layer.nameChanged, changed),
+            (layer.updatedFields, fields_changed),
+            (layer.dataSourceChanged, fields_changed),
+        ]
+        for signal, slot in slots:
+            signal.connect(slot)
+        self.layers[layer_id] = (layer, slots)
+
+    def unobserve(self, layer_id):
+        self.cancel_task(layer_id)
+        self.dirty.discard(layer_id)
+        self.model.remove_section(layer_id)
+        layer, slots = self.layers.pop(layer_id, (None, ()))
+        try:
+            for signal, slot in slots:
+                signal.disconnect(slot)
+        except (RuntimeError, TypeError):
+            pass
+
+    def slot_fieldsChanged(self, layer_id):
+        self.panel.schemas.pop(layer_id, None)
+        self.mark_dirty(layer_id)
+
+    def mark_dirty(self, layer_id, *args):
+        self.dirty.add(layer_id)
+        self.timer.start(0)
+
+    def refresh_dirty(self):
+        dirty, self.dirty = self.dirty, set()
+        order = {x: i for i, x in enumerate(
+                 QgsProject.instance().layerTreeRoot().findLayerIds())}
+        for layer_id in dirty:
+            if layer_id in self.layers:
+                self.refresh_layer(self.layers[layer_id][0], order)
+
+    def refresh_layer(self, layer, order):
+        layer_id = layer.id()
+        self.cancel_task(layer_id)
+        count = layer.selectedFeatureCount()
+        if not count:
+            self.model.remove_section(layer_id)
+            return
+        schema = self.panel.get_schema(layer)
+        summary = self.panel.create_summary(schema.visible_indexes(layer), layer)
+        # Sections follow the layer tree order
+        position = order.get(layer_id, len(order))
+        row = sum(order.get(x.layer_id, len(order)) < position
+                  for x in self.model.sections)
+        is_new = self.model.section_row(layer_id) < 0
+        self.model.set_section(layer_id, layer.name(), count,
+                               [schema.field_list[x] for x in summary.indexes()],
+                               row=row)
+        if is_new:
+            self.panel.dock.view.expand(
+                    self.model.index(self.model.section_row(layer_id), 0))
+        task = CollectTask(
+                self.panel.tr('Collecting attribute values of {}').format(layer.name()),
+                QgsVectorLayerFeatureSource(layer), layer.selectedFeatureIds(),
+                summary, pushdown=self.panel.get_pushdown(layer),
+                prefetch=self.panel.get_prefetch(layer))
+        task.taskCompleted.connect(partial(self.slot_taskCompleted, layer_id, task))
+        task.taskTerminated.connect(partial(self.slot_taskTerminated, layer_id, task))
+        self.tasks[layer_id] = task
+        QgsApplication.taskManager().addTask(task)
+
+    def slot_taskCompleted(self, layer_id, task):
+        if self.tasks.get(layer_id) is task:
+            del self.tasks[layer_id]
+            self.model.set_section_values(layer_id, task.summary.values)
+
+    def slot_taskTerminated(self, layer_id, task):
+        if self.tasks.get(layer_id) is task:
+            del self.tasks[layer_id]
+
+    def cancel_task(self, layer_id):
+        task = self.tasks.pop(layer_id, None)
+        if task is not None:
+            task.cancel()
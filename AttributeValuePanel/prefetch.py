@@ -0,0 +1,143 @@
+# -*- coding: utf-8 -*-
+"""
+/***************************************************************************
+ Attribute Value Panel
+                                 A QGIS plugin
+ Lists attribute values of selected features vertically
+                             -------------------
+        begin                : 2025-11-30
+        copyright            : (C) 2025 by Tarot Osuji
+        email                : tarot@sdf.org
+        git sha              : $Format:%H$
+ ***************************************************************************/
+
+/***************************************************************************
+ *                                                                         *
+ *   This program is free software; you can redistribute it and/or modify  *
+ *   it under the terms of the GNU General Public License as published by  *
+ *   the Free Software Foundation; either version 2 of the License, or     *
+ *   (at your option) any later version.                                   *
+ *                                                                         *
+ ***************************************************************************/
+"""
+
+from qgis.core import (QgsExpression, QgsVectorLayerFeatureSource,
+                       NULL)
+from .aggregate import attribute_request
+from .bulk_edit import chunked
+from .compat_type import FieldOrigin
+
+KEY_CHUNK_SIZE = 1000  # join values per request
+
+
+class Join:
+    __slots__ = ('target_idx', 'join_field', 'source', 'source_indexes')
+
+    def __init__(self, target_idx, join_field, source):
+        self.target_idx = target_idx  # key field of the layer
+        self.join_field = join_field  # key field name of the joined layer
+        self.source = source
+        self.source_indexes = {}  # field index -> joined layer field index
+
+
+class JoinPrefetch:
+    # Fills joined fields with one keyed request per joined layer, instead
+    # of a lookup per feature by the layer's feature iterator.
+    # Like the iterator, the first joined feature with a matching key wins.
+    # Created on the main thread, collect() may run in a worker thread.
+    def __init__(self, joins):
+        self.joins = joins
+        self.fields = {}  # field index -> Join
+        for join in joins:
+            for idx in join.source_indexes:
+                self.fields[idx] = join
+
+    @classmethod
+    def create(cls, layer):
+        # Returns None for layers without joins that can be prefetched
+        fields = layer.fields()
+        buffer = layer.joinBuffer()
+        joins = {}  # (joined layer id, key field names) -> Join
+        for idx in fields.allAttributesList():
+            if fields.fieldOrigin(idx) != FieldOrigin.Join:
+                continue
+            info, source_idx = buffer.joinForFieldIndex(idx, fields)
+            if info is None or source_idx < 0 or info.joinLayer() is None:
+                continue
+            target_idx = fields.lookupField(info.targetFieldName())
+            if target_idx < 0 or fields.fieldOrigin(target_idx) not in (
+                    FieldOrigin.Provider, FieldOrigin.Edit):
+                continue  # keys that are joined or computed themselves
+            key = (info.joinLayerId(), info.targetFieldName(), info.joinFieldName())
+            join = joins.get(key)
+            if join is None:
+                join = joins[key] = Join(target_idx, info.joinFieldName(),
+                        QgsVectorLayerFeatureSource(info.joinLayer()))
+            join.source_indexes[idx] = source_idx
+        return cls(list(joins.values())) if joins else None
+
+    def fetch_rows(self, join, keys, is_canceled):
+        # Joined attributes by key value, also by its string as in the
+        # cached joins of QGIS
+        fields = join.source.fields()
+        key_idx = fields.lookupField(join.join_field)
+        if key_idx < 0:
+            return {}
+        indexes = sorted(set(join.source_indexes.values()) | {key_idx})
+        column = QgsExpression.quotedColumnRef(join.join_field)
+        rows = {}
+        for chunk in chunked(list(keys), KEY_CHUNK_SIZE):
+            if is_canceled and is_canceled():
+                return None
+            req = attribute_request(indexes)
+            req.setFilterExpression('%s IN (%s)' % (
+                    column, ','.join(map(QgsExpression.quotedValue, chunk))))
+            for feat in join.source.getFeatures(req):
+                attrs = feat.attributes()
+                rows.setdefault(attrs[key_idx], attrs)
+                rows.setdefault(str(attrs[key_idx]), attrs)
+        return rows
+
+    def collect(self, source, fids, summary, positions=None, is_canceled=None):
+        # Returns the positions filled in
+        if positions is None:
+            positions = range(len(summary.columns))
+        targets = [(pos, idx) for pos, idx in zip(positions, summary.indexes(positions))
+                   if idx in self.fields]
+        if not targets:
+            return []
+        joins = list({id(self.fields[idx]): self.fields[idx]
+                      for _, idx in targets}.values())
+
+        # Key values of the selected features, provider fields only
+        req = attribute_request(sorted({x.target_idx for x in joins}))
+        req.setFilterFids(fids)
+        keys = {}  # fid -> attributes
+        for n, feat in enumerate(source.getFeatures(req), 1):
+            keys[feat.id()] = feat.attributes()
+            if not n % 1000 and is_canceled and is_canceled():
+                return []
+
+        rows_by_join = []
+        for join in joins:
+            values = {attrs[join.target_idx] for attrs in keys.values()}
+            values = [x for x in values if not x == None]
+            rows = self.fetch_rows(join, values, is_canceled)
+            if rows is None:
+                return []
+            rows_by_join.append((join, rows))
+
+        filled = [pos for pos, _ in targets]
+        summary.inverted.clear()
+        for fid, attrs in keys.items():
+            joined = {}  # field index -> value
+            for join, rows in rows_by_join:
+                key = attrs[join.target_idx]
+                row = rows.get(key)
+                if row is None and not key == None:
+                    row = rows.get(str(key))
+                for idx, source_idx in join.source_indexes.items():
+                    joined[idx] = NULL if row is None else row[source_idx]
+            summary.add_partial(fid, joined, filled)
+        summary.n_features = len(keys)
+        return filled
@@ -0,0 +1,195 @@
+# -*- coding: utf-8 -*-
+"""
+/***************************************************************************
+ Attribute Value Panel
+                                 A QGIS plugin
+ Lists attribute values of selected features vertically
+                             -------------------
+        begin                : 2025-11-30
+        copyright            : (C) 2025 by Tarot Osuji
+        email                : tarot@sdf.org
+        git sha              : $Format:%H$
+ ***************************************************************************/
+
+/***************************************************************************
+ *                                                                         *
+ *   This program is free software; you can redistribute it and/or modify  *
+ *   it under the terms of the GNU General Public License as published by  *
+ *   the Free Software Foundation; either version 2 of the License, or     *
+ *   (at your option) any later version.                                   *
+ *                                                                         *
+ ***************************************************************************/
+"""
+
+from qgis.core import (QgsDataSourceUri, QgsProviderRegistry,
+                       QgsProviderConnectionException, NULL)
+from .compat_type import CompatType, FieldOrigin
+from .bulk_edit import chunked
+
+# Types that convert reliably from the raw column values
+PUSHDOWN_TYPES = (
+    CompatType.Bool,
+    CompatType.Int,
+    CompatType.LongLong,
+    CompatType.Double,
+    CompatType.QString,
+    CompatType.QDate,
+    CompatType.QByteArray,  # null check only
+)
+FID_CHUNK_SIZE = 10000  # keeps the statements well below SQLite's length limit
+COLUMN_BATCH_SIZE = 16  # columns counted per statement
+
+
+def quote(name):
+    return '"%s"' % name.replace('"', '""')
+
+
+class SqlPushdown:
+    # Counts the distinct values of the selected features in the database,
+    # so that only the distinct values cross the provider boundary.
+    # Created on the main thread, collect() may run in a worker thread.
+    def __init__(self, provider, uri, table, fid_column, fields):
+        self.provider = provider
+        self.uri = uri
+        self.table = table
+        self.fid_column = fid_column
+        self.fields = fields  # field index -> QgsField, supported ones only
+
+    @classmethod
+    def create(cls, layer):
+        # Returns None for layers the database cannot answer for
+        dp = layer.dataProvider()
+        fields = layer.fields()
+        pks = [idx for idx in fields.allAttributesList()
+               if fields.fieldOrigin(idx) == FieldOrigin.Provider and
+               fields.fieldOriginIndex(idx) in dp.pkAttributeIndexes()]
+        if len(pks) != 1:
+            return None
+        pk_field = fields.at(pks[0])
+        if dp.name() == 'ogr':
+            if dp.storageType() != 'GPKG':
+                return None
+            parts = QgsProviderRegistry.instance().decodeUri('ogr', layer.source())
+            uri = parts.get('path')
+            table = parts.get('layerName')
+            if not (uri and table):
+                return None
+            table = quote(table)
+        elif dp.name() in ('spatialite', 'postgres'):
+            ds_uri = QgsDataSourceUri(dp.dataSourceUri())
+            if not ds_uri.table() or ds_uri.table().startswith('('):
+                return None  # query layer
+            uri = dp.dataSourceUri()
+            table = quote(ds_uri.table())
+            if ds_uri.schema():
+                table = '%s.%s' % (quote(ds_uri.schema()), table)
+        else:
+            return None
+        # Feature ids are the key values only for plain integer keys
+        if pk_field.type() != CompatType.Int and not (
+                dp.name() != 'postgres' and pk_field.type() == CompatType.LongLong):
+            return None
+        supported = {idx: fields.at(idx) for idx in fields.allAttributesList()
+                     if fields.fieldOrigin(idx) == FieldOrigin.Provider and
+                     fields.at(idx).type() in PUSHDOWN_TYPES}
+        return cls(dp.name(), uri, table, quote(pk_field.name()), supported)
+
+    @staticmethod
+    def column_expression(field):
+        if field.type() == CompatType.QByteArray:
+            # Only whether it is set, the payload stays in the database
+            return 'CASE WHEN %s IS NULL THEN 0 ELSE 1 END' % quote(field.name())
+        return quote(field.name())
+
+    @staticmethod
+    def batch_statement(columns, table, where):
+        # Counts of several columns over one fid filter, in one round trip.
+        # Every column has its own result column, NULL in the rows of the
+        # others, so that the types of the UNION stay compatible.
+        # The NULLs are typed by a subquery, PostgreSQL resolves the types
+        # of a chain of UNIONs pair by pair.
+        cte = 'WITH s AS (SELECT %s FROM %s WHERE %s)' % (
+                ', '.join('%s AS v%d' % (column, i) for i, column in enumerate(columns)),
+                table, where)
+        nulls = ['(SELECT v%d FROM s WHERE 1 = 0)' % i for i in range(len(columns))]
+        branches = []
+        for i in range(len(columns)):
+            values = list(nulls)
+            values[i] = 'v%d' % i
+            branches.append('SELECT %d, %s, COUNT(*) FROM s GROUP BY v%d' % (
+                    i, ', '.join(values), i))
+        return '%s %s' % (cte, ' UNION ALL '.join(branches))
+
+    def collect_presence(self, fids, summary, targets, is_canceled=None):
+        # Whether the blobs of each feature are set, keyed by fid so that
+        # the values per feature are kept. Returns the positions filled in.
+        try:
+            md = QgsProviderRegistry.instance().providerMetadata(self.provider)
+            conn = md.createConnection(self.uri, {})
+            rows = []
+            for chunk in chunked(sorted(fids), FID_CHUNK_SIZE):
+                if is_canceled and is_canceled():
+                    return []
+                rows.extend(conn.executeSql('SELECT %s, %s FROM %s WHERE %s IN (%s)' % (
+                        self.fid_column, ', '.join(x[1] for x in targets),
+                        self.table, self.fid_column, ','.join(map(str, chunk)))))
+        except (QgsProviderConnectionException, ValueError):
+            return []
+        positions = [pos for pos, _, _ in targets]
+        summary.inverted.clear()
+        for row in rows:
+            summary.add_partial(int(row[0]), {
+                    field_idx: True if str(value) == '1' else NULL
+                    for field_idx, value in zip(summary.indexes(positions), row[1:])},
+                    positions)
+        summary.n_features = len(rows)
+        return positions
+
+    def collect(self, fids, summary, positions=None, is_canceled=None):
+        # Returns the positions filled in, empty if the database failed
+        if positions is None:
+            positions = range(len(summary.columns))
+        if summary.rows is not None and not (
+                summary.row_limit and len(fids) > summary.row_limit):
+            # The values per feature are kept for deltas and drill-down,
+            # they need a scan anyway except for the blob payloads
+            blobs = [(pos, self.column_expression(self.fields[idx]), self.fields[idx])
+                     for pos, idx in zip(positions, summary.indexes(positions))
+                     if idx in self.fields and
+                     self.fields[idx].type() == CompatType.QByteArray]
+            if not blobs:
+                return []
+            return self.collect_presence(fids, summary, blobs, is_canceled)
+        targets = [(pos, self.column_expression(self.fields[idx]), self.fields[idx])
+                   for pos, idx in zip(positions, summary.indexes(positions))
+                   if idx in self.fields]
+        if not targets:
+            return []
+        results = {pos: {} for pos, _, _ in targets}
+        try:
+            md = QgsProviderRegistry.instance().providerMetadata(self.provider)
+            conn = md.createConnection(self.uri, {})
+            for chunk in chunked(sorted(fids), FID_CHUNK_SIZE):
+                where = '%s IN (%s)' % (self.fid_column, ','.join(map(str, chunk)))
+                for batch in chunked(targets, COLUMN_BATCH_SIZE):
+                    if is_canceled and is_canceled():
+                        return []
+                    sql = self.batch_statement([x[1] for x in batch], self.table, where)
+                    for row in conn.executeSql(sql):
+                        i = int(row[0])
+                        pos, _, field = batch[i]
+                        value, n = row[1 + i], row[-1]
+                        counts = results[pos]
+                        if field.type() == CompatType.QByteArray:
+                            value = True if str(value) == '1' else NULL
+                        elif value == None:
+                            value = NULL
+                        else:
+                            value = field.convertCompatible(value)
+                        counts[value] = counts.get(value, 0) + int(n)
+        except (QgsProviderConnectionException, ValueError):
+            return []
+        for pos, counts in results.items():
+            summary.add_counts(pos, counts.items())
+        summary.n_features = len(fids)
+        return list(results)
@@ -0,0 +1,123 @@
+# -*- coding: utf-8 -*-
+"""
+/***************************************************************************
+ Attribute Value Panel
+                                 A QGIS plugin
+ Lists attribute values of selected features vertically
+                             -------------------
+        begin                : 2025-11-30
+        copyright            : (C) 2025 by Tarot Osuji
+        email                : tarot@sdf.org
+        git sha              : $Format:%H$
+ ***************************************************************************/
+
+/***************************************************************************
+ *                                                                         *
+ *   This program is free software; you can redistribute it and/or modify  *
+ *   it under the terms of the GNU General Public License as published by  *
+ *   the Free Software Foundation; either version 2 of the License, or     *
+ *   (at your option) any later version.                                   *
+ *                                                                         *
+ ***************************************************************************/
+"""
+
+from qgis.core import QgsApplication
+from .aggregate import make_converter
+from .compat_type import FieldOrigin
+from .pushdown import SqlPushdown
+
+
+# Layer custom properties, saved with the project
+PINNED_PROPERTY = 'AttributeValuePanel/pinnedFields'
+HIDDEN_PROPERTY = 'AttributeValuePanel/hiddenFields'
+
+
+def field_profile(layer, key):
+    # Field names listed in a custom property
+    names = layer.customProperty(key, [])
+    if isinstance(names, str):  # single values may come back unwrapped
+        return [names]
+    return list(names or [])
+
+
+def set_field_profile(layer, key, names):
+    if names:
+        layer.setCustomProperty(key, names)
+    else:
+        layer.removeCustomProperty(key)
+
+
+def is_autogenerated(dp, foi):
+    if dp.name() == 'ogr':
+        ctx = 'QgsOgrProvider'
+    elif dp.name() == 'spatialite':
+        ctx = 'QgsSpatiaLiteProvider'
+    else:
+        ctx = None
+    s_autogen = QgsApplication.translate(ctx, 'Autogenerate')
+    return dp.defaultValueClause(foi) == s_autogen
+
+
+class LayerSchema:
+    # Static facts about the fields of a layer. Some of them need provider
+    # round trips, e.g. default value clauses are catalog queries on PostgreSQL.
+    # Built once per layer, dropped when its fields or data source change.
+    def __init__(self, layer):
+        dp = layer.dataProvider()
+        pks = dp.pkAttributeIndexes()
+        fields = layer.fields()
+        self.fields = fields
+        self.indexes = fields.allAttributesList()
+        self.encoding = dp.encoding()
+        self.is_legacy_format = dp.storageType() in ('ESRI Shapefile', 'MapInfo File')
+        self.field_list = []
+        self.origins = []
+        self.type_strings = []
+        self.converters = {}
+        self.derived_indexes = []  # join and expression fields
+        self.has_joins = False  # values depend on other layers
+        self.pushdown = None
+        self.visible = None
+        for idx in self.indexes:
+            field = fields.at(idx)
+            foi = fields.fieldOriginIndex(idx)
+            origin = fields.fieldOrigin(idx)
+            is_autogen = foi in pks and is_autogenerated(dp, foi)
+
+            self.field_list.append(field)
+            self.origins.append(origin if not is_autogen else FieldOrigin.Unknown)
+            self.converters[idx] = make_converter(field, is_autogen)
+            if origin in (FieldOrigin.Join, FieldOrigin.Expression):
+                # May depend on other fields, deltas are not enough
+                self.derived_indexes.append(idx)
+            if origin == FieldOrigin.Join:
+                self.has_joins = True
+
+            s = field.displayType(showConstraints=True)
+            if foi in pks:
+                s = s.replace(' N', ' PK N', 1)
+            if ('NOT NULL' not in s) and (' NULL' in s):
+                s = s.replace(' NULL', '')
+            self.type_strings.append(s)
+
+    def visible_indexes(self, layer):
+        # Pinned fields first, hidden ones are never requested
+        if self.visible is None:
+            pinned = field_profile(layer, PINNED_PROPERTY)
+            hidden = set(field_profile(layer, HIDDEN_PROPERTY))
+            pinned_indexes = [self.fields.lookupField(x) for x in pinned]
+            pinned_indexes = [x for x in pinned_indexes if x >= 0]
+            self.visible = pinned_indexes + [
+                    x for x in self.indexes
+                    if x not in pinned_indexes and
+                    self.fields.at(x).name() not in hidden]
+        return self.visible
+
+    def matches(self, layer):
+        # Cheap check for changes made while the layer was not observed
+        return self.fields == layer.fields()
+
+    def get_pushdown(self, layer):
+        if self.pushdown is None:
+            self.pushdown = SqlPushdown.create(layer) or False
+        return self.pushdown or None
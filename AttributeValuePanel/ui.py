@@ -21,24 +21,23 @@
  ***************************************************************************/
 """
 
-from qgis.PyQt.QtCore import Qt, QObject, QEvent, QDate, QTime, QDateTime
-from qgis.PyQt.QtGui import QPalette, QStandardItemModel
+from array import array
+from functools import partial
+from qgis.PyQt.QtCore import (Qt, QObject, QEvent, QDate, QTime, QDateTime,
+                              QAbstractItemModel,
+                              QModelIndex, QTimer, pyqtSignal)
+from qgis.PyQt.QtGui import QPalette, QFont, QFontMetrics
 from qgis.PyQt.QtWidgets import *
-from qgis.core import Qgis, QgsApplication, NULL
+from qgis.core import QgsApplication, NULL
 from qgis.gui import QgsFilterLineEdit, QgsDateEdit, QgsTimeEdit, QgsDateTimeEdit
-if Qgis.QGIS_VERSION_INT >= 33800:
-    FieldOrigin = Qgis.FieldOrigin
-else:
-    from qgis.core import QgsFields
-    FieldOrigin = QgsFields.FieldOrigin
-    FieldOrigin.Provider = FieldOrigin.OriginProvider
-    FieldOrigin.Edit = FieldOrigin.OriginEdit
 if __package__:
     from .edit import IntFilterLineEdit, DoubleFilterLineEdit, ByteFilterLineEdit
-    from .compat_type import CompatType
+    from .compat_type import CompatType, FieldOrigin
+    from .instrument import STATS
 else:
     from edit import IntFilterLineEdit, DoubleFilterLineEdit, ByteFilterLineEdit
-    from compat_type import CompatType
+    from compat_type import CompatType, FieldOrigin
+    from instrument import STATS
 
 
 def str_to_bool(s):
@@ -47,35 +46,415 @@ def str_to_bool(s):
     return bool(s)
 
 
-class AttributeValueModel(QStandardItemModel):
+def display_strings(field, data):
+    if (field.type() == CompatType.QVariantMap or
+        field.typeName().endswith('List')):
+        return data
+    return (field.displayString(x) for x in data)
+
+
+class SearchIndex:
+    # Lowercased names and aliases of the fields, built once per model reset,
+    # and lowercased value texts, cached per row until its values change
+    def __init__(self, fields):
+        self.fields = fields
+        self.names = ['{}\n{}'.format(x.name(), x.alias()).lower() for x in fields]
+        self.value_texts = {}  # row -> (data, revision, text)
+
+    def value_text(self, row, data):
+        if data is None:
+            return ''
+        revision = getattr(data, 'revision', None)
+        cached = self.value_texts.get(row)
+        if cached is not None and cached[0] is data and cached[1] == revision:
+            return cached[2]
+        text = '\n'.join(display_strings(self.fields[row], data)).lower()
+        self.value_texts[row] = (data, revision, text)
+        return text
+
+    def match(self, needle, values):
+        # 1 for the rows whose name, alias or values contain needle
+        if not needle:
+            return bytearray(b'\x01') * len(self.names)
+        value_text = self.value_text
+        return bytearray(needle in name or needle in value_text(row, data)
+                         for row, (name, data) in enumerate(zip(self.names, values)))
+
+
+class AttributeValueModel(QAbstractItemModel):
+    # One row per field. Rows with several values have the frequencies of
+    # their values as children, which carry the row of their field + 1 as
+    # internal id, fields have 0.
     FIELD_COLUMN = 0
     VALUE_COLUMN = 1
+    EDITABLE_TYPES = (
+        CompatType.Bool,
+        CompatType.Int,
+        CompatType.LongLong,
+        CompatType.Double,
+        CompatType.QString,
+        CompatType.QDate,
+        CompatType.QTime,
+        CompatType.QDateTime,
+    )
+
+    valueEdited = pyqtSignal(int, object)  # row, value
 
     def __init__(self):
         super().__init__()
-        self.setHorizontalHeaderLabels([self.tr('Field'), self.tr('Value')])
+        self.labels = [self.tr('Field'), self.tr('Value')]
+        self.progress = ''
         self.is_legacy_format = False
         self.encoding = 'utf-8'
+        self.set_rows([], [], [], [])
+
+    def set_rows(self, fields, indexes, origins, values, enabled=True):
+        # values: per row summary handle, iterable over distinct values
+        with STATS.timed('populate', len(fields)):
+            self.set_rows_(fields, indexes, origins, values, enabled)
+
+    def set_rows_(self, fields, indexes, origins, values, enabled):
+        self.beginResetModel()
+        self.fields = fields
+        self.field_indexes = array('i', indexes)
+        self.origins = origins
+        self.types = [x.type() for x in fields]
+        self.names = [x.displayNameWithAlias() for x in fields]
+        self.values = values
+        self.frequencies = {}  # row -> [(value, count)], built on expanding
+        self.search_index = None  # built on the first search
+        self.is_enabled = enabled
+        self.editable = bytearray(
+                enabled and
+                origin in (FieldOrigin.Provider, FieldOrigin.Edit) and
+                type_ in self.EDITABLE_TYPES
+                for origin, type_ in zip(origins, self.types))
+        self.endResetModel()
+
+    def clear_rows(self):
+        self.set_rows([], [], [], [])
+
+    def field(self, row):
+        return self.fields[row]
+
+    def field_at(self, index):
+        if index.internalId():
+            return self.fields[index.internalId() - 1]
+        return self.fields[index.row()]
+
+    def value_data(self, index):
+        if index.internalId():
+            return (self.frequency(index.internalId() - 1)[index.row()][0], )
+        return self.values[index.row()]
+
+    def has_frequency(self, row):
+        # Only exact counts of several values are worth drilling into
+        values = self.values[row]
+        return (self.is_enabled and hasattr(values, 'counts') and
+                not values.overflow and len(values) > 1)
+
+    def sorted_counts(self, row):
+        # (value, count) of the values of a row, most frequent first
+        if not self.has_frequency(row):
+            return []
+        return sorted(self.values[row].counts.items(), key=lambda x: -x[1])
+
+    def frequency(self, row):
+        freq = self.frequencies.get(row)
+        if freq is None:
+            freq = self.frequencies[row] = self.sorted_counts(row)
+        return freq
+
+    def update_frequency(self, row):
+        # Replaces the children of a row whose values changed
+        old = self.frequencies.get(row)
+        if old is None:
+            return  # not built yet
+        parent = self.index(row, 0)
+        if old:
+            self.beginRemoveRows(parent, 0, len(old) - 1)
+            self.frequencies[row] = []
+            self.endRemoveRows()
+        new = self.sorted_counts(row)
+        if new:
+            self.beginInsertRows(parent, 0, len(new) - 1)
+            self.frequencies[row] = new
+            self.endInsertRows()
+
+    def match_rows(self, needle, parent=QModelIndex()):
+        if self.search_index is None:
+            self.search_index = SearchIndex(self.fields)
+        return self.search_index.match(needle, self.values)
+
+    def set_values(self, rows, values):
+        for row, value in zip(rows, values):
+            self.values[row] = value
+        self.refresh_rows(rows)
+
+    def refresh_rows(self, rows):
+        # One signal per run of consecutive rows
+        rows = sorted(rows)
+        start = 0
+        for i, row in enumerate(rows, 1):
+            if i == len(rows) or rows[i] != row + 1:
+                self.dataChanged.emit(self.index(rows[start], self.VALUE_COLUMN),
+                                      self.index(row, self.VALUE_COLUMN))
+                start = i
+            if row in self.frequencies:
+                self.update_frequency(row)
+
+    def index(self, row, column, parent=QModelIndex()):
+        if not self.hasIndex(row, column, parent):
+            return QModelIndex()
+        return self.createIndex(row, column,
+                                parent.row() + 1 if parent.isValid() else 0)
+
+    def parent(self, index):
+        if not index.isValid() or not index.internalId():
+            return QModelIndex()
+        return self.createIndex(index.internalId() - 1, 0, 0)
+
+    def rowCount(self, parent=QModelIndex()):
+        if not parent.isValid():
+            return len(self.fields)
+        if parent.internalId() or parent.column() > 0:
+            return 0
+        return len(self.frequency(parent.row()))
+
+    def hasChildren(self, parent=QModelIndex()):
+        if not parent.isValid():
+            return bool(self.fields)
+        if parent.internalId() or parent.column() > 0:
+            return False
+        return self.has_frequency(parent.row())
+
+    def columnCount(self, parent=QModelIndex()):
+        return 2
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if (orientation == Qt.Orientation.Horizontal and
+                role == Qt.ItemDataRole.DisplayRole):
+            if section == self.VALUE_COLUMN and self.progress:
+                return '{} ({})'.format(self.labels[section], self.progress)
+            return self.labels[section]
+        return None
+
+    def set_progress(self, text=''):
+        # Shown in the value header while partial values are streamed in
+        if text != self.progress:
+            self.progress = text
+            self.headerDataChanged.emit(Qt.Orientation.Horizontal,
+                                        self.VALUE_COLUMN, self.VALUE_COLUMN)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if index.internalId():
+            # Frequency of a value, the value itself is painted by the delegate
+            if index.column() == self.FIELD_COLUMN:
+                if role == Qt.ItemDataRole.DisplayRole:
+                    return self.frequency(index.internalId() - 1)[index.row()][1]
+                if role == Qt.ItemDataRole.TextAlignmentRole:
+                    return Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter
+            elif role == Qt.ItemDataRole.DisplayRole:
+                return self.value_data(index)
+            return None
+        if index.column() == self.FIELD_COLUMN:
+            if role == Qt.ItemDataRole.DisplayRole:
+                return self.names[index.row()]
+            if role == Qt.ItemDataRole.EditRole:
+                return self.fields[index.row()]
+        elif role in (Qt.ItemDataRole.DisplayRole, Qt.ItemDataRole.EditRole):
+            return self.values[index.row()]
+        return None
+
+    def setData(self, index, value, role=Qt.ItemDataRole.EditRole):
+        # Nothing is stored here, the owner writes the value to the layer
+        # and refreshes the row.
+        if (index.column() != self.VALUE_COLUMN or index.internalId() or
+                not self.editable[index.row()]):
+            return False
+        self.valueEdited.emit(index.row(), value)
+        return True
 
     def flags(self, index):
-        flags = super().flags(index)
-        if index.column() == self.VALUE_COLUMN:
-            field_index = index.siblingAtColumn(self.FIELD_COLUMN)
-            field = field_index.data(Qt.ItemDataRole.EditRole)
-            origin = field_index.data(Qt.ItemDataRole.UserRole)
-            if origin in (FieldOrigin.Provider, FieldOrigin.Edit):
-                if field.type() in (
-                        CompatType.Bool,
-                        CompatType.Int,
-                        CompatType.LongLong,
-                        CompatType.Double,
-                        CompatType.QString,
-                        CompatType.QDate,
-                        CompatType.QTime,
-                        CompatType.QDateTime,
-                ):
-                    return flags | Qt.ItemFlag.ItemIsEditable
-        return flags & ~Qt.ItemFlag.ItemIsEditable
+        if not self.is_enabled and index.column() == self.VALUE_COLUMN:
+            return Qt.ItemFlag.NoItemFlags  # field names stay usable
+        flags = Qt.ItemFlag.ItemIsEnabled | Qt.ItemFlag.ItemIsSelectable
+        if (index.column() == self.VALUE_COLUMN and not index.internalId() and
+                self.editable[index.row()] and
+                self.values[index.row()] is not None):
+            return flags | Qt.ItemFlag.ItemIsEditable
+        return flags
+
+
+class Section:
+    __slots__ = ('key', 'layer_id', 'name', 'count', 'fields', 'names', 'values',
+                 'search_index')
+
+    def __init__(self, key, layer_id):
+        self.key = key
+        self.layer_id = layer_id
+        self.fields = []
+        self.values = None  # per field, None until collected
+
+
+class MultiLayerModel(QAbstractItemModel):
+    # Read-only tree of one section per layer, with the fields of the layer
+    # as children. Children carry the key of their section as internal id,
+    # sections have 0.
+    FIELD_COLUMN = 0
+    VALUE_COLUMN = 1
+
+    def __init__(self):
+        super().__init__()
+        self.labels = [self.tr('Field'), self.tr('Value')]
+        self.sections = []
+        self.next_key = 1
+
+    def section_row(self, layer_id):
+        for row, section in enumerate(self.sections):
+            if section.layer_id == layer_id:
+                return row
+        return -1
+
+    def key_row(self, key):
+        for row, section in enumerate(self.sections):
+            if section.key == key:
+                return row
+        return -1
+
+    def set_section(self, layer_id, name, count, fields, values=None, row=None):
+        # Adds or replaces a section, row is where to insert a new one
+        pos = self.section_row(layer_id)
+        if pos < 0:
+            pos = len(self.sections) if row is None else min(row, len(self.sections))
+            self.beginInsertRows(QModelIndex(), pos, pos)
+            section = Section(self.next_key, layer_id)
+            self.next_key += 1
+            self.sections.insert(pos, section)
+            self.fill_section(section, name, count, fields, values)
+            self.endInsertRows()
+            return
+        section = self.sections[pos]
+        parent = self.index(pos, 0)
+        if section.fields:
+            self.beginRemoveRows(parent, 0, len(section.fields) - 1)
+            section.fields = []
+            self.endRemoveRows()
+        if fields:
+            self.beginInsertRows(parent, 0, len(fields) - 1)
+            self.fill_section(section, name, count, fields, values)
+            self.endInsertRows()
+        else:
+            self.fill_section(section, name, count, fields, values)
+        self.dataChanged.emit(parent, self.index(pos, self.VALUE_COLUMN))
+
+    def fill_section(self, section, name, count, fields, values):
+        section.name = name
+        section.count = count
+        section.fields = fields
+        section.names = [x.displayNameWithAlias() for x in fields]
+        section.values = values
+        section.search_index = None
+
+    def set_section_values(self, layer_id, values):
+        pos = self.section_row(layer_id)
+        if pos < 0:
+            return
+        section = self.sections[pos]
+        section.values = values
+        if section.fields:
+            parent = self.index(pos, 0)
+            self.dataChanged.emit(self.index(0, self.VALUE_COLUMN, parent),
+                    self.index(len(section.fields) - 1, self.VALUE_COLUMN, parent))
+
+    def match_rows(self, needle, parent=QModelIndex()):
+        if not parent.isValid():
+            return bytearray(b'\x01') * len(self.sections)  # always shown
+        section = self.sections[parent.row()]
+        if section.search_index is None:
+            section.search_index = SearchIndex(section.fields)
+        values = section.values
+        if values is None:
+            values = [None] * len(section.fields)
+        return section.search_index.match(needle, values)
+
+    def remove_section(self, layer_id):
+        pos = self.section_row(layer_id)
+        if pos >= 0:
+            self.beginRemoveRows(QModelIndex(), pos, pos)
+            del self.sections[pos]
+            self.endRemoveRows()
+
+    def clear_sections(self):
+        self.beginResetModel()
+        self.sections = []
+        self.endResetModel()
+
+    def index(self, row, column, parent=QModelIndex()):
+        if not self.hasIndex(row, column, parent):
+            return QModelIndex()
+        if parent.isValid():
+            return self.createIndex(row, column, self.sections[parent.row()].key)
+        return self.createIndex(row, column, 0)
+
+    def parent(self, index):
+        if not index.isValid() or not index.internalId():
+            return QModelIndex()
+        row = self.key_row(index.internalId())
+        return self.createIndex(row, 0, 0) if row >= 0 else QModelIndex()
+
+    def section_of(self, index):
+        # The section of a child index, None for sections
+        key = index.internalId()
+        if not key:
+            return None
+        row = self.key_row(key)
+        return self.sections[row] if row >= 0 else None
+
+    def rowCount(self, parent=QModelIndex()):
+        if not parent.isValid():
+            return len(self.sections)
+        if parent.internalId() or parent.column() > 0:
+            return 0
+        return len(self.sections[parent.row()].fields)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 2
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if (orientation == Qt.Orientation.Horizontal and
+                role == Qt.ItemDataRole.DisplayRole):
+            return self.labels[section]
+        return None
+
+    def field_at(self, index):
+        section = self.section_of(index)
+        return None if section is None else section.fields[index.row()]
+
+    def value_data(self, index):
+        section = self.section_of(index)
+        if section is None:
+            return (self.tr('{} selected').format(
+                    self.sections[index.row()].count), )
+        return None if section.values is None else section.values[index.row()]
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        section = self.section_of(index)
+        if index.column() == self.FIELD_COLUMN:
+            if role == Qt.ItemDataRole.DisplayRole:
+                if section is None:
+                    return self.sections[index.row()].name
+                return section.names[index.row()]
+            if role == Qt.ItemDataRole.FontRole and section is None:
+                font = QFont()
+                font.setBold(True)
+                return font
+        elif role == Qt.ItemDataRole.DisplayRole:
+            return self.value_data(index)
+        return None
+
+    def flags(self, index):
+        return Qt.ItemFlag.ItemIsEnabled | Qt.ItemFlag.ItemIsSelectable
 
 
 class EnterFlagFilter(QObject):
@@ -87,18 +466,71 @@ class EnterFlagFilter(QObject):
 
 
 class AttributeValueView(QTreeView):
+    valuesRequested = pyqtSignal(int)  # row painted before its values are loaded
+
     def __init__(self):
         super().__init__()
         self.setAlternatingRowColors(True)
-        self.setRootIsDecorated(False)
+        self.setRootIsDecorated(True)  # value frequencies, see AttributeValueModel
         self.setTextElideMode(Qt.TextElideMode.ElideRight)
         self.header().setSectionResizeMode(QHeaderView.ResizeMode.Interactive)
 
         # https://stackoverflow.com/q/27248148
-        self.setItemDelegateForColumn(
-                AttributeValueModel.FIELD_COLUMN, self.FieldItemDelegate(self))
         self.setItemDelegateForColumn(
                 AttributeValueModel.VALUE_COLUMN, self.ValueItemDelegate(self))
+        self.filter_text = ''
+        self.has_hidden_rows = False
+        # Changes of many rows are matched again once
+        self.filter_timer = QTimer(self)
+        self.filter_timer.setSingleShot(True)
+        self.filter_timer.timeout.connect(self.apply_filter)
+
+    def setModel(self, model):
+        delegate = self.itemDelegateForColumn(AttributeValueModel.VALUE_COLUMN)
+        old = self.model()
+        if old is not None:
+            # Models are switched by the multi-layer mode
+            old.dataChanged.disconnect(delegate.slot_dataChanged)
+            old.rowsRemoved.disconnect(delegate.clear_cache)
+            old.rowsInserted.disconnect(delegate.clear_cache)
+            old.modelReset.disconnect(delegate.clear_cache)
+            old.dataChanged.disconnect(self.slot_filterDataChanged)
+            old.rowsInserted.disconnect(self.apply_filter)
+            old.modelReset.disconnect(self.apply_filter)
+        super().setModel(model)
+        delegate.clear_cache()
+        model.dataChanged.connect(delegate.slot_dataChanged)
+        model.rowsRemoved.connect(delegate.clear_cache)
+        model.rowsInserted.connect(delegate.clear_cache)
+        model.modelReset.connect(delegate.clear_cache)
+        model.dataChanged.connect(self.slot_filterDataChanged)
+        model.rowsInserted.connect(self.apply_filter)
+        model.modelReset.connect(self.apply_filter)
+        self.apply_filter()
+
+    def set_filter(self, text):
+        self.filter_text = text.strip().lower()
+        self.apply_filter()
+
+    def slot_filterDataChanged(self, topLeft, bottomRight):
+        if self.filter_text:  # values may match now, or no longer
+            self.filter_timer.start(0)
+
+    def apply_filter(self, *args):
+        self.filter_timer.stop()
+        if not (self.filter_text or self.has_hidden_rows):
+            return
+        model = self.model()
+        parents = [QModelIndex()]
+        if isinstance(model, MultiLayerModel):
+            parents += [model.index(row, 0) for row in range(model.rowCount())]
+        has_hidden_rows = False
+        for parent in parents:
+            for row, is_match in enumerate(model.match_rows(self.filter_text, parent)):
+                if self.isRowHidden(row, parent) == bool(is_match):
+                    self.setRowHidden(row, parent, not is_match)
+                has_hidden_rows = has_hidden_rows or not is_match
+        self.has_hidden_rows = has_hidden_rows
 
     def set_editable(self, editable):
         self.setEditTriggers(
@@ -106,71 +538,172 @@ class AttributeValueView(QTreeView):
                 if editable else
                 QTreeView.EditTrigger.NoEditTriggers)
 
-    class FieldItemDelegate(QStyledItemDelegate):
-        def displayText(self, value, locale=None):
-            return value.displayNameWithAlias()
-
     class ValueItemDelegate(QStyledItemDelegate):
+        EDITOR_POOL_SIZE = 2  # per editor class
+
+        def __init__(self, parent=None):
+            super().__init__(parent)
+            self.editor_pool = {}  # editor class -> hidden editors
+            # (row, internal id) -> (data, revision, width, elided text)
+            self.text_cache = {}
+
+        def clear_cache(self):
+            self.text_cache.clear()
+
+        def slot_dataChanged(self, topLeft, bottomRight):
+            key = topLeft.internalId()
+            for row in range(topLeft.row(), bottomRight.row() + 1):
+                self.text_cache.pop((row, key), None)
+
         def displayText_(self, index):
-            data = index.data(Qt.ItemDataRole.EditRole)
-            field = index.siblingAtColumn(AttributeValueModel.FIELD_COLUMN
-                    ).data(Qt.ItemDataRole.EditRole)
-            if (field.type() == CompatType.QVariantMap or
-                field.typeName().endswith('List')):
-                strs = data
-            else:
-                strs = (field.displayString(x) for x in data)
-            return ', '.join(strs)
+            data = index.model().value_data(index)
+            field = index.model().field_at(index)
+            if field is None:
+                return ', '.join(data)  # section of MultiLayerModel
+            if getattr(data, 'overflow', False):
+                # Capped, see ValueCounts
+                n = data.estimate()
+                if n is None:
+                    s = self.tr('{}+ distinct values').format(len(data))
+                else:
+                    s = self.tr('~{} distinct values').format(n)
+                if hasattr(data, 'stats'):
+                    s = '{}; {}'.format(self.statsText_(field, data.stats()), s)
+                return s
+            return ', '.join(display_strings(field, data))
+
+        def statsText_(self, field, stats):
+            # See NumericCounts
+            count, nulls, min_, max_, mean, sum_ = stats
+            if min_ is None:
+                return self.tr('count {}, nulls {}').format(count, nulls)
+            if field.type() != CompatType.Double:
+                min_, max_, sum_ = int(min_), int(max_), int(sum_)
+            return self.tr('count {}, nulls {}, min {}, max {}, mean {}, sum {}').format(
+                    count, nulls, field.displayString(min_),
+                    field.displayString(max_), '{:.6g}'.format(mean),
+                    field.displayString(sum_))
 
         def paint(self, painter, option, index):
+            if not STATS.enabled:
+                self.paint_(painter, option, index)
+                return
+            with STATS.timed('paint'):
+                self.paint_(painter, option, index)
+
+        def paint_(self, painter, option, index):
             opt = QStyleOptionViewItem(option)
             self.initStyleOption(opt, index)
 
-            data = index.data(Qt.ItemDataRole.EditRole)
+            data = index.model().value_data(index)
+            if data is None:
+                opt.text = '\u2026'
+                opt.font.setItalic(True)
+                opt.palette.setColor(QPalette.ColorRole.Text, Qt.GlobalColor.gray)
+                style = opt.widget.style() if opt.widget else QApplication.style()
+                style.drawControl(style.ControlElement.CE_ItemViewItem, opt, painter)
+                if not index.internalId():  # lazy loading of the flat model
+                    self.parent().valuesRequested.emit(index.row())
+                return
             if len(data) > 1:
                 opt.font.setItalic(True)
             if NULL in data:
                 opt.font.setItalic(True)
                 opt.palette.setColor(QPalette.ColorRole.Text, Qt.GlobalColor.gray)
-            opt.text = self.displayText_(index)
 
             style = opt.widget.style() if opt.widget else QApplication.style()
+            width = style.subElementRect(QStyle.SubElement.SE_ItemViewItemText,
+                                         opt, opt.widget).width()
+            revision = getattr(data, 'revision', None)
+            key = (index.row(), index.internalId())
+            cached = self.text_cache.get(key)
+            if (cached is not None and cached[0] is data and
+                    cached[1] == revision and cached[2] == width):
+                opt.text = cached[3]
+            else:
+                opt.text = QFontMetrics(opt.font).elidedText(
+                        self.displayText_(index), opt.textElideMode, width)
+                self.text_cache[key] = (data, revision, width, opt.text)
             style.drawControl(style.ControlElement.CE_ItemViewItem, opt, painter)
 
-        def createEditor(self, parent, option, index):
-            field = index.siblingAtColumn(AttributeValueModel.FIELD_COLUMN
-                    ).data(Qt.ItemDataRole.EditRole)
+        def editorClass_(self, field):
             if field.type() == CompatType.QDate:
-                editor = QgsDateEdit(parent)
-                editor.valueChanged_ = editor.dateValueChanged
+                return QgsDateEdit
             elif field.type() == CompatType.QTime:
-                editor = QgsTimeEdit(parent)
+                return QgsTimeEdit
+            elif field.type() == CompatType.QDateTime:
+                return QgsDateTimeEdit
+            elif field.type() in (CompatType.Int, CompatType.LongLong):
+                return IntFilterLineEdit
+            elif field.type() == CompatType.Double:
+                return DoubleFilterLineEdit
+            elif field.type() == CompatType.QString:
+                return ByteFilterLineEdit
+            return QgsFilterLineEdit
+
+        def newEditor_(self, cls, parent):
+            if cls in (IntFilterLineEdit, DoubleFilterLineEdit, ByteFilterLineEdit):
+                editor = cls(parent=parent)  # configured in createEditor
+            else:
+                editor = cls(parent)
+            if cls is QgsDateEdit:
+                editor.valueChanged_ = editor.dateValueChanged
+                editor.reset_ = partial(editor.setDate, editor.date())
+            elif cls is QgsTimeEdit:
                 editor.valueChanged_ = editor.timeValueChanged
+                editor.reset_ = partial(editor.setTime, editor.time())
+            elif cls is QgsDateTimeEdit:
+                editor.valueChanged_ = editor.valueChanged
+                editor.reset_ = partial(editor.setDateTime, editor.dateTime())
             else:
-                if field.type() == CompatType.QDateTime:
-                    editor = QgsDateTimeEdit(parent)
-                else:
-                    if field.type() in (CompatType.Int, CompatType.LongLong):
-                        editor = IntFilterLineEdit(field.length(),
-                                self.parent().model().is_legacy_format, parent)
-                    elif field.type() == CompatType.Double:
-                        editor = DoubleFilterLineEdit(field.length(),
-                                field.precision(),
-                                self.parent().model().is_legacy_format, parent)
-                    elif field.type() == CompatType.QString:
-                        editor = ByteFilterLineEdit(field.length(),
-                                self.parent().model().encoding,
-                                self.parent().model().is_legacy_format, parent)
-                        editor.setNullValue(QgsApplication.nullRepresentation())
-                    else:
-                        editor = QgsFilterLineEdit(parent)
+                if cls is ByteFilterLineEdit:
+                    editor.setNullValue(QgsApplication.nullRepresentation())
                 editor.valueChanged_ = editor.valueChanged
+                editor.reset_ = partial(editor.setText, '')
+            editor.valueChanged_.connect(partial(self.slot_valueChanged_, editor))
             editor.filter_ = EnterFlagFilter()  # for avoid GC
             editor.installEventFilter(editor.filter_)
             return editor
 
+        def createEditor(self, parent, option, index):
+            # Editors are reused, see destroyEditor
+            field = index.model().field(index.row())
+            model = self.parent().model()
+            cls = self.editorClass_(field)
+            pool = self.editor_pool.get(cls)
+            editor = None
+            while pool and editor is None:
+                editor = pool.pop()
+                if editor.parent() is not parent:
+                    editor.deleteLater()
+                    editor = None
+            if editor is None:
+                editor = self.newEditor_(cls, parent)
+            else:
+                editor.reset_()
+            if cls is IntFilterLineEdit:
+                editor.configure(field.length(), model.is_legacy_format)
+            elif cls is DoubleFilterLineEdit:
+                editor.configure(field.length(), field.precision(),
+                                 model.is_legacy_format)
+            elif cls is ByteFilterLineEdit:
+                editor.configure(field.length(), model.encoding,
+                                 model.is_legacy_format)
+            editor.is_changed = False
+            editor.has_entered = False
+            return editor
+
+        def destroyEditor(self, editor, index):
+            # Already hidden by the view, kept for the next field of the type
+            pool = self.editor_pool.setdefault(type(editor), [])
+            if len(pool) < self.EDITOR_POOL_SIZE:
+                pool.append(editor)
+            else:
+                super().destroyEditor(editor, index)
+
         def setEditorData(self, editor, index):
-            first = next(iter(index.data()))
+            first = next(iter(index.model().values[index.row()]))
+            is_changed = editor.is_changed  # not by the user
             if isinstance(editor, QgsDateEdit):
                 if first:
                     editor.setDate(first)
@@ -183,8 +716,7 @@ class AttributeValueView(QTreeView):
             else:
                 if first is not None:
                     editor.setValue(str(first))
-            editor.valueChanged_.connect(
-                    lambda: self.slot_valueChanged_(editor))
+            editor.is_changed = is_changed
 
         def slot_valueChanged_(self, editor):
             setattr(editor, 'is_changed', True)
@@ -203,8 +735,7 @@ class AttributeValueView(QTreeView):
                 value = editor.dateTime()
             else:
                 text = editor.value()
-                field = index.siblingAtColumn(AttributeValueModel.FIELD_COLUMN
-                        ).data(Qt.ItemDataRole.EditRole)
+                field = model.field(index.row())
                 try:
                     if field.type() == CompatType.Bool:
                         value = str_to_bool(text) if len(text) else NULL
@@ -218,35 +749,81 @@ class AttributeValueView(QTreeView):
                         value = text
                 except ValueError:
                     return
-            model.setData(index, (value,))
+            model.setData(index, value)
 
 
 class AttributeValueDock(QDockWidget):
     def __init__(self, parent=None):
         super().__init__(parent)
         self.view = AttributeValueView()
-        self.view.setModel(AttributeValueModel())
-        self.setWidget(self.view)
+        self.model = AttributeValueModel()
+        self.multi_layer_model = MultiLayerModel()
+        self.view.setModel(self.model)
+        self.multi_layer_action = QAction(self.tr('Show All Layers with Selection'), self)
+        self.multi_layer_action.setCheckable(True)
+        self.view.setContextMenuPolicy(Qt.ContextMenuPolicy.ActionsContextMenu)
+        self.view.addAction(self.multi_layer_action)
+        # Field profiles of the layer, saved with the project
+        self.pin_action = QAction(self.tr('Pin or Unpin Field'), self)
+        self.hide_action = QAction(self.tr('Hide Field'), self)
+        self.show_hidden_action = QAction(self.tr('Show Hidden Fields'), self)
+        self.view.addActions([self.pin_action, self.hide_action,
+                              self.show_hidden_action])
+        self.search = QgsFilterLineEdit()
+        self.search.setShowSearchIcon(True)
+        self.search.setPlaceholderText(self.tr('Search fields or values\u2026'))
+        self.search.textChanged.connect(self.view.set_filter)
+        # Debug footer, shown while instrumentation is enabled
+        self.footer = QLabel()
+        self.footer.setVisible(False)
+        self.footer.linkActivated.connect(lambda link: STATS.dump())
+        widget = QWidget()
+        layout = QVBoxLayout(widget)
+        layout.setContentsMargins(0, 0, 0, 0)
+        layout.setSpacing(0)
+        layout.addWidget(self.search)
+        layout.addWidget(self.view)
+        layout.addWidget(self.footer)
+        self.setWidget(widget)
+
+    def set_multi_layer(self, enabled):
+        model = self.multi_layer_model if enabled else self.model
+        if self.view.model() is not model:
+            self.view.setModel(model)
+
+    def set_footer_visible(self, visible):
+        self.footer.setVisible(visible)
+        self.update_footer()
+
+    def update_footer(self):
+        if not self.footer.isVisible():
+            return
+        refresh = STATS.last('refresh')
+        fetch = STATS.last('fetch')
+        populate = STATS.last('populate')
+        self.footer.setText(self.tr(
+                '{:.0f} ms, {} features scanned, {} rows built '
+                '<a href="dump">Log</a>').format(
+                refresh[0] * 1000 if refresh else 0,
+                fetch[1] if fetch else 0,
+                populate[1] if populate else 0))
 
 
 if __name__ == '__main__':
-    from qgis.PyQt.QtGui import QStandardItem
     from qgis.core import QgsField
     app = QApplication([])
     dock = AttributeValueDock()
-    for k, v in [(QgsField('bool', CompatType.Bool), {True, NULL}),
-                 (QgsField('int', CompatType.Int), {123, 456}),
-                 (QgsField('double', CompatType.Double), {123.45, 678.90}),
-                 (QgsField('QString', CompatType.QString), {'abc', 'def', NULL}),
-                 (QgsField('QDate', CompatType.QDate), {QDate.currentDate()}),
-                 (QgsField('QTime', CompatType.QTime), [QTime.currentTime(), QTime.currentTime()]),
-                 (QgsField('QDateTime', CompatType.QDateTime), [QDateTime.currentDateTime()]),
-                ]:
-        k_item = QStandardItem()
-        k_item.setData(k, Qt.ItemDataRole.EditRole)
-        k_item.setData(FieldOrigin.Provider, Qt.ItemDataRole.UserRole)
-        v_item = QStandardItem()
-        v_item.setData(v, Qt.ItemDataRole.EditRole)
-        dock.view.model().appendRow([k_item, v_item])
+    fields, values = zip(*[
+            (QgsField('bool', CompatType.Bool), {True, NULL}),
+            (QgsField('int', CompatType.Int), {123, 456}),
+            (QgsField('double', CompatType.Double), {123.45, 678.90}),
+            (QgsField('QString', CompatType.QString), {'abc', 'def', NULL}),
+            (QgsField('QDate', CompatType.QDate), {QDate.currentDate()}),
+            (QgsField('QTime', CompatType.QTime), [QTime.currentTime(), QTime.currentTime()]),
+            (QgsField('QDateTime', CompatType.QDateTime), [QDateTime.currentDateTime()]),
+    ])
+    dock.view.model().set_rows(list(fields), range(len(fields)),
+            [FieldOrigin.Provider] * len(fields), list(values))
+    dock.view.set_editable(True)
     dock.show()
     app.exec()
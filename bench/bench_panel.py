@@ -0,0 +1,285 @@
+# -*- coding: utf-8 -*-
+"""
+/***************************************************************************
+ Attribute Value Panel
+                                 A QGIS plugin
+ Lists attribute values of selected features vertically
+                             -------------------
+        begin                : 2025-11-30
+        copyright            : (C) 2025 by Tarot Osuji
+        email                : tarot@sdf.org
+        git sha              : $Format:%H$
+ ***************************************************************************/
+
+/***************************************************************************
+ *                                                                         *
+ *   This program is free software; you can redistribute it and/or modify  *
+ *   it under the terms of the GNU General Public License as published by  *
+ *   the Free Software Foundation; either version 2 of the License, or     *
+ *   (at your option) any later version.                                   *
+ *                                                                         *
+ ***************************************************************************/
+
+Headless benchmarks of the panel's hot paths.
+
+    QT_QPA_PLATFORM=offscreen python bench/bench_panel.py -o results.json
+    QT_QPA_PLATFORM=offscreen python bench/bench_panel.py --baseline results.json
+"""
+
+import argparse
+import gc
+import json
+import os
+import platform
+import resource
+import sys
+import tempfile
+import time
+import tracemalloc
+from itertools import product
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from qgis.PyQt.QtCore import QObject, QCoreApplication, pyqtSignal
+from qgis.PyQt.QtWidgets import QMainWindow
+from qgis.core import (Qgis, QgsApplication, QgsCoordinateTransformContext,
+                       QgsFeature, QgsSettings, QgsVectorFileWriter,
+                       QgsVectorLayer)
+
+
+class BenchIface(QObject):
+    # The parts of QgisInterface used by the panel
+    currentLayerChanged = pyqtSignal(object)
+
+    def __init__(self):
+        super().__init__()
+        self.window = QMainWindow()
+        self.window.resize(1200, 1000)
+        self.layer = None
+
+    def mainWindow(self):
+        return self.window
+
+    def activeLayer(self):
+        return self.layer
+
+    def messageBar(self):
+        return self
+
+    def pushCritical(self, title, message):
+        print('{}: {}'.format(title, message), file=sys.stderr)
+
+    def addTabifiedDockWidget(self, area, dock, order=(), raised=False):
+        self.window.addDockWidget(area, dock)
+
+    def removeDockWidget(self, dock):
+        self.window.removeDockWidget(dock)
+
+    def set_layer(self, layer):
+        self.layer = layer
+        self.currentLayerChanged.emit(layer)
+
+
+def process_events():
+    # Runs the panel's zero interval timers
+    for _ in range(3):
+        QCoreApplication.processEvents()
+
+
+def make_memory_layer(n_fields, n_features, cardinality):
+    # Integer, double and string fields in turn
+    types = ('integer', 'double', 'string')
+    uri = 'None?' + '&'.join('field=f{}:{}'.format(i, types[i % 3])
+                             for i in range(n_fields))
+    layer = QgsVectorLayer(uri, 'bench', 'memory')
+    fields = layer.fields()
+    dp = layer.dataProvider()
+    features = []
+    for fid in range(n_features):
+        feat = QgsFeature(fields)
+        v = fid % cardinality
+        feat.setAttributes([v if i % 3 == 0 else v + 0.5 if i % 3 == 1 else
+                            'value {}'.format(v) for i in range(n_fields)])
+        features.append(feat)
+        if len(features) == 10000:
+            dp.addFeatures(features)
+            features = []
+    dp.addFeatures(features)
+    return layer
+
+
+def make_gpkg_layer(memory_layer, directory):
+    path = os.path.join(directory, 'bench_{}.gpkg'.format(id(memory_layer)))
+    options = QgsVectorFileWriter.SaveVectorOptions()
+    options.driverName = 'GPKG'
+    options.layerName = 'bench'
+    if hasattr(QgsVectorFileWriter, 'writeAsVectorFormatV3'):  # QGIS >= 3.20
+        res = QgsVectorFileWriter.writeAsVectorFormatV3(memory_layer, path,
+                QgsCoordinateTransformContext(), options)
+    else:
+        res = QgsVectorFileWriter.writeAsVectorFormatV2(memory_layer, path,
+                QgsCoordinateTransformContext(), options)
+    if res[0] != QgsVectorFileWriter.NoError:
+        raise RuntimeError('Failed to write {}: {}'.format(path, res[1]))
+    return QgsVectorLayer('{}|layername=bench'.format(path), 'bench', 'ogr')
+
+
+def measure(func, repeat):
+    # Best wall time of the repeats, and the peak of Python allocations
+    best = float('inf')
+    gc.collect()
+    tracemalloc.start()
+    for _ in range(repeat):
+        t = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - t)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return best, peak
+
+
+def bench_layer(panel, iface, layer, n_selected, repeat):
+    results = {}
+    iface.set_layer(layer)
+    layer.selectByIds(list(layer.allFeatureIds())[:n_selected])
+    panel.clear_pending()
+    n_fields = layer.fields().count()
+
+    # refresh_model, the summary cache would answer the repeats
+    panel.result_cache.clear()
+    seconds, peak = measure(panel.refresh_model, repeat)
+    results['refresh_model'] = {
+        'seconds': seconds,
+        'values_per_second': n_selected * n_fields / seconds,
+        'peak_bytes': peak,
+    }
+
+    model = panel.model
+    rows = range(model.rowCount())
+
+    def flags():
+        for row in rows:
+            model.flags(model.index(row, model.VALUE_COLUMN))
+    seconds, peak = measure(flags, repeat)
+    results['model_flags'] = {
+        'seconds': seconds,
+        'rows_per_second': len(rows) / seconds if seconds else None,
+        'peak_bytes': peak,
+    }
+
+    view = panel.dock.view
+    delegate = view.itemDelegateForColumn(model.VALUE_COLUMN)
+
+    def paint_cold():
+        delegate.clear_cache()
+        view.viewport().grab()
+    seconds, peak = measure(paint_cold, repeat)
+    results['delegate_paint_cold'] = {'seconds': seconds, 'peak_bytes': peak}
+    seconds, peak = measure(view.viewport().grab, repeat)
+    results['delegate_paint_cached'] = {'seconds': seconds, 'peak_bytes': peak}
+
+    # Bulk edits of the first string field, through the edit buffer
+    row = 2 if n_fields > 2 else 0
+    layer.startEditing()
+    counter = iter(range(10 ** 9))
+
+    def edit():
+        panel.slot_valueEdited(row, 'edited {}'.format(next(counter)))
+        process_events()
+    seconds, peak = measure(edit, repeat)
+    layer.rollBack()
+    results['bulk_edit'] = {
+        'seconds': seconds,
+        'features_per_second': n_selected / seconds,
+        'peak_bytes': peak,
+    }
+    process_events()
+    return results
+
+
+def compare(results, baseline):
+    base = {x['case']: x for x in baseline['cases']}
+    for case in results['cases']:
+        old = base.get(case['case'])
+        if old is None:
+            continue
+        for name, metrics in case['results'].items():
+            before = old['results'].get(name, {}).get('seconds')
+            if before:
+                print('{:<48} {:<24} {:>8.2f}x'.format(
+                        case['case'], name, metrics['seconds'] / before))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[-1],
+            formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--fields', default='10,200,2000')
+    parser.add_argument('--features', default='1,1000,100000,1000000')
+    parser.add_argument('--cardinality', default='10,1000000',
+                        help='distinct values per field')
+    parser.add_argument('--providers', default='memory,gpkg')
+    parser.add_argument('--max-cells', type=float, default=2e7,
+                        help='skips cases with more fields * features')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('-o', '--output', help='write the results as JSON')
+    parser.add_argument('--baseline', help='compare with earlier results')
+    args = parser.parse_args()
+
+    profile = tempfile.mkdtemp(prefix='avp_bench_')
+    app = QgsApplication([], True, profile)
+    app.initQgis()
+    st = QgsSettings()
+    st.setValue('AttributeValuePanel/asyncRefresh', False)  # timed inline
+    st.setValue('AttributeValuePanel/lazyFieldThreshold', 0)
+
+    from AttributeValuePanel import classFactory
+    iface = BenchIface()
+    iface.window.show()
+    panel = classFactory(iface)
+    panel.initGui()
+    panel.dock.show()
+    process_events()
+
+    results = {
+        'qgis': Qgis.QGIS_VERSION,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cases': [],
+    }
+    for provider, n_fields, n_features, cardinality in product(
+            args.providers.split(','),
+            map(int, args.fields.split(',')),
+            map(int, args.features.split(',')),
+            map(int, args.cardinality.split(','))):
+        if n_fields * n_features > args.max_cells:
+            continue
+        case = '{} fields={} features={} cardinality={}'.format(
+                provider, n_fields, n_features, cardinality)
+        print(case, file=sys.stderr)
+        layer = make_memory_layer(n_fields, n_features, min(cardinality, n_features))
+        if provider == 'gpkg':
+            layer = make_gpkg_layer(layer, profile)
+        results['cases'].append({
+            'case': case,
+            'results': bench_layer(panel, iface, layer, n_features, args.repeat),
+        })
+        iface.set_layer(None)
+        del layer
+        process_events()
+    results['max_rss_kb'] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    panel.unload()
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+    else:
+        json.dump(results, sys.stdout, indent=2)
+    if args.baseline:
+        with open(args.baseline) as f:
+            compare(results, json.load(f))
+    app.exitQgis()
+
+
+if __name__ == '__main__':
+    main()